@@ -52,12 +52,25 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 # Passwords
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "project.users.hashers.CalibratedArgon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
     "django.contrib.auth.hashers.BCryptPasswordHasher",
 ]
+PASSWORD_HASHING_WORKERS = env.int("PASSWORD_HASHING_WORKERS", default=2)
+PASSWORD_HASHING_QUEUE_SIZE = env.int("PASSWORD_HASHING_QUEUE_SIZE", default=8)
+# Hashes in progress across every worker process, see project.users.hashers
+PASSWORD_HASHING_SLOTS_BACKEND = "project.users.hashers.LocalHashingSlots"
+PASSWORD_HASHING_MAX_CONCURRENCY = env.int("PASSWORD_HASHING_MAX_CONCURRENCY", default=4)
+PASSWORD_HASHING_SLOT_LEASE = 10
+ARGON2_TARGET_MS = env.int("ARGON2_TARGET_MS", default=100)
+ARGON2_MAX_MEMORY_KIB = env.int("ARGON2_MAX_MEMORY_KIB", default=32768)
+# Hash parameters shared by every replica, see project.users.hashers
+ARGON2_TIME_COST = env.int("ARGON2_TIME_COST", default=None)
+ARGON2_MEMORY_COST = env.int("ARGON2_MEMORY_COST", default=None)
+ARGON2_PARALLELISM = env.int("ARGON2_PARALLELISM", default=None)
+ARGON2_PARAMETERS_FILE = env("ARGON2_PARAMETERS_FILE", default=ROOT_DIR("argon2.json"))
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"
@@ -95,6 +108,10 @@ STATICFILES_FINDERS = [
 # Media
 MEDIA_ROOT = str(APPS_DIR("media"))
 MEDIA_URL = "/media/"
+# Resized copies of profile pictures, see project.users.pictures
+PROFILE_PICTURE_SIZES = (64, 128, 256, 512)
+PROFILE_PICTURE_FORMATS = ("webp", "jpeg")
+PROFILE_PICTURE_QUALITY = 80
 
 # Templates
 TEMPLATES = [
@@ -140,10 +157,15 @@ MANAGERS = ADMINS
 
 # Django REST Framework
 REST_FRAMEWORK = {
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_RENDERER_CLASSES": ("project.renderers.JSONRenderer",),
+    "DEFAULT_PARSER_CLASSES": (
+        "project.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "JSON_UNDERSCOREIZE": {"no_underscore_before_number": True},
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_jwt.authentication.JSONWebTokenAuthentication",
+        "project.users.authentication.JSONWebTokenAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 10,
@@ -172,4 +194,61 @@ JWT_AUTH = {
     "JWT_AUTH_COOKIE": None,
 }
 
+# Asymmetric JWT signing keys, newest first, as dicts of kid, algorithm
+# (RS256, ES256, ...), public_key and, for the signing key, private_key
+# PEM strings. See project.users.keyring.
+JWT_SIGNING_KEYS = []
+JWKS_MAX_AGE = 60 * 60
+
+# Per-user JWT secrets, when JWT_GET_USER_SECRET_KEY is set
+JWT_USER_SECRET_CACHE_SIZE = 10000
+JWT_USER_SECRET_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Cached user issued_at, checked against the orig_iat of every token
+USER_ISSUED_AT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Tokens verified by a worker are trusted for this many seconds at most
+# before being checked again.
+VERIFIED_TOKEN_CACHE_SIZE = 10000
+VERIFIED_TOKEN_CACHE_TIMEOUT = 10
+
+# Serialized users, checked against the modified timestamps of the user
+# and its profile
+USER_REPRESENTATION_CACHE_TIMEOUT = 60 * 60 * 24
+# Serialize users with the introspection free UserReadSerializer
+FAST_USER_SERIALIZER = env.bool("FAST_USER_SERIALIZER", default=False)
+
+# Most tokens accepted by one token/verify/batch request
+TOKEN_VERIFY_BATCH_SIZE = 500
+
 CORS_ORIGIN_WHITELIST = ("localhost:3000", "127.0.0.1:8000")
+
+# Token deny list
+DENYLIST_BLOOM_CAPACITY = env.int("DENYLIST_BLOOM_CAPACITY", default=100000)
+DENYLIST_BLOOM_ERROR_RATE = 0.001
+DENYLIST_SYNC_INTERVAL = env.float("DENYLIST_SYNC_INTERVAL", default=1.0)
+DENYLIST_PURGE_BATCH_SIZE = 1000
+
+# Rate limiting of the unauthenticated user actions, by client IP and by
+# submitted email. See project.users.throttling.
+RATE_LIMIT_BACKEND = "project.users.throttling.LocalSlidingWindow"
+RATE_LIMITS = {
+    "login": {"ip": "30/min", "email": "10/min"},
+    "signup": {"ip": "10/min", "email": "5/min"},
+    "token_refresh": {"ip": "60/min"},
+    "token_verify": {"ip": "120/min"},
+    "token_verify_batch": {"ip": "30/min"},
+    "token_deny": {"ip": "60/min"},
+}
+
+# Celery
+CELERY_BROKER_URL = env("REDIS_URL", default="redis://localhost:6379/0")
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_ACCEPT_CONTENT = ["json"]
+CELERY_TASK_SERIALIZER = "json"
+CELERY_BEAT_SCHEDULE = {
+    "purge-denied-tokens": {
+        "task": "project.users.tasks.purge_denied_tokens",
+        "schedule": datetime.timedelta(hours=1),
+    }
+}
@@ -27,6 +27,17 @@ CACHES = {
     }
 }
 
+# Password hashing, admitted across the gunicorn workers. Each worker runs
+# GUNICORN_THREADS (4) request threads, the local pool takes at most 3.
+PASSWORD_HASHING_SLOTS_BACKEND = "project.users.hashers.RedisHashingSlots"
+PASSWORD_HASHING_QUEUE_SIZE = env.int("PASSWORD_HASHING_QUEUE_SIZE", default=1)
+
+# Rate limiting
+RATE_LIMIT_BACKEND = "project.users.throttling.RedisSlidingWindow"
+# Proxies in front of the app, so throttling keys on the client IP taken
+# from X-Forwarded-For.
+REST_FRAMEWORK["NUM_PROXIES"] = env.int("DJANGO_NUM_PROXIES", default=1)  # noqa F405
+
 # Security
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 SECURE_SSL_REDIRECT = env.bool("DJANGO_SECURE_SSL_REDIRECT", default=True)
@@ -23,8 +23,16 @@ CACHES = {
     }
 }
 
+# Rate limiting
+RATE_LIMIT_BACKEND = "project.users.throttling.LocalSlidingWindow"
+
+# Celery
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
 # Passwords
 PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+PASSWORD_HASHING_SLOTS_BACKEND = "project.users.hashers.LocalHashingSlots"
 
 # Templates
 TEMPLATES[0]["OPTIONS"]["debug"] = DEBUG  # NOQA
@@ -5,9 +5,12 @@ from django.urls import include, path
 from django.conf.urls.static import static
 from django.contrib import admin
 
+from project.users.views.keys import jwks
+
 
 urlpatterns = [
     # Django Admin
     path(settings.ADMIN_URL, admin.site.urls),
     path("v1/", include("project.users.urls")),
+    path(".well-known/jwks.json", jwks, name="jwks"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
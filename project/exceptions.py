@@ -1,4 +1,8 @@
-from rest_framework.views import exception_handler
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler, set_rollback
+
+from project.users.hashers import PasswordHashingBusy
 
 
 def custom_exception_handler(exc, context):  # type: ignore
@@ -12,3 +16,11 @@ def custom_exception_handler(exc, context):  # type: ignore
 
     if response is not None:
         return response
+
+    if isinstance(exc, PasswordHashingBusy):
+        set_rollback()
+        return Response(
+            {"detail": "Too many requests in progress, try again later."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
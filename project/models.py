@@ -1,6 +1,40 @@
+import os
+import threading
+import time
 import uuid
+
 from django.db import models
 
+_last_uuid7_timestamp = 0
+_uuid7_lock = threading.Lock()
+
+
+def uuid7():
+    """Return a time-ordered UUID, version 7 of RFC 9562.
+
+    The 48 most significant bits hold the Unix time in milliseconds and the
+    next 12 (after the version) a fraction of the millisecond, so keys
+    created later sort higher and inserts land at the right edge of the
+    primary key index. Within a process the timestamp is bumped if needed
+    to keep the ids strictly increasing. The remaining 62 bits are random.
+    """
+    global _last_uuid7_timestamp
+    with _uuid7_lock:
+        milliseconds, fraction = divmod(int(time.time() * 10 ** 6), 1000)
+        timestamp = (milliseconds << 12) | (fraction * 4096 // 1000)
+        if timestamp <= _last_uuid7_timestamp:
+            timestamp = _last_uuid7_timestamp + 1
+        _last_uuid7_timestamp = timestamp
+
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return uuid.UUID(
+        int=(timestamp >> 12) << 80
+        | 0x7 << 76
+        | (timestamp & 0xFFF) << 64
+        | 0b10 << 62
+        | random_bits
+    )
+
 
 class BaseModel(models.Model):
     """Base model Date
@@ -10,9 +44,12 @@ class BaseModel(models.Model):
     every table with the following attributes:
         + created (DateTime): Store the datetime the object was created.
         + modified (DateTime): Store the last datetime the object was modified.
+
+    Querysets are unordered by default, so point lookups and existence
+    checks don't pay for a sort. Listings order explicitly.
     """
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=uuid7)
     created = models.DateTimeField(
         "created at",
         auto_now_add=True,
@@ -27,4 +64,3 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
         get_latest_by = "created"
-        ordering = ["-created"]
@@ -1,13 +1,37 @@
 """User models admin."""
 
 # Django
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 
 # Models
+from project.users.filters import (
+    MIN_SEARCH_WORD_LENGTH,
+    search_users,
+    search_words,
+)
 from project.users.models import User, Profile
 
 
+def get_user_search_results(
+    model_admin, request, queryset, search_term, prefix=""
+):
+    """
+    Admin search through `search_users`. A term made of words too short to
+    be searched matches nothing, rather than every user.
+    """
+    if search_term.strip() and not search_words(search_term):
+        if request is not None:
+            model_admin.message_user(
+                request,
+                "Search words must be at least %d characters long."
+                % MIN_SEARCH_WORD_LENGTH,
+                messages.WARNING,
+            )
+        return queryset.none(), False
+    return search_users(queryset, search_term, prefix=prefix), False
+
+
 class CustomUserAdmin(UserAdmin):
     """User model admin."""
 
@@ -21,12 +45,16 @@ class CustomUserAdmin(UserAdmin):
     )
     list_filter = ("is_client", "is_staff", "created", "modified")
 
+    def get_search_results(self, request, queryset, search_term):
+        return get_user_search_results(self, request, queryset, search_term)
+
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     """Profile model admin."""
 
     list_display = ("user",)
+    ordering = ("-created",)
     search_fields = (
         "user__username",
         "user__email",
@@ -34,5 +62,10 @@ class ProfileAdmin(admin.ModelAdmin):
         "user__last_name",
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        return get_user_search_results(
+            self, request, queryset, search_term, prefix="user__"
+        )
+
 
 admin.site.register(User, CustomUserAdmin)
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, setting_changed
 
 
 class UsersAppConfig(AppConfig):
     name = "project.users"
     verbose_name = "Users"
+
+    def ready(self):
+        from project.users import signals  # noqa
+        from project.users.auth import forget_resolved_users
+        from project.users.hashers import (
+            reset_argon2_parameters,
+            reset_hashing_slots,
+        )
+        from project.users.keyring import get_key_ring, reset_key_ring
+        from project.users.throttling import reset_rate_limiter
+
+        request_finished.connect(forget_resolved_users)
+        setting_changed.connect(reset_key_ring)
+        setting_changed.connect(reset_argon2_parameters)
+        setting_changed.connect(reset_hashing_slots)
+        setting_changed.connect(reset_rate_limiter)
+        get_key_ring()
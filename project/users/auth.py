@@ -1,17 +1,105 @@
+import json
 import jwt
+import threading
 import uuid
 
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 
 from calendar import timegm
+from collections.abc import Mapping
 from datetime import datetime
 
-from jwt import InvalidTokenError
+from jwt import DecodeError, InvalidAlgorithmError, InvalidTokenError
+from jwt.utils import merge_dict
 from rest_framework_jwt.compat import get_username
 from rest_framework_jwt.compat import get_username_field
 from rest_framework_jwt.settings import api_settings
 
-from project.users.models.deniedtokens import DeniedToken
+from project.users.caches import (
+    add_issued_at_watermarks,
+    get_issued_at_watermark,
+    get_issued_at_watermarks,
+    get_user_version,
+    issued_at_watermark,
+    user_secrets,
+    verified_tokens,
+)
+from project.users.denylist import denylist, token_jti
+from project.users.keyring import get_key_ring
+
+_resolved_users = threading.local()
+
+
+def remember_resolved_user(user):
+    """
+    Keep a user loaded while decoding a token for the rest of the request,
+    so authentication and views don't have to query it again.
+    """
+    if not hasattr(_resolved_users, "users"):
+        _resolved_users.users = {}
+    _resolved_users.users[str(user.pk)] = user
+
+
+def get_resolved_user(user_id):
+    """
+    Return the user resolved for `user_id` during this request, if any.
+    """
+    return getattr(_resolved_users, "users", {}).get(str(user_id))
+
+
+def forget_resolved_users(**kwargs):
+    """
+    Drop the users resolved during the request. Connected to `request_finished`.
+    """
+    _resolved_users.users = {}
+
+
+def get_user_issued_at(user_id):
+    """
+    Return the epoch before which tokens of `user_id` are rejected, from
+    the cache or, on a miss, from the user loaded for the rest of the request.
+    Every token of a disabled user is rejected.
+    """
+    user_issued_at = get_issued_at_watermark(user_id)
+    if user_issued_at is None:
+        User = get_user_model()  # noqa: N806
+        try:
+            user = User.objects.select_related("profile").get(pk=user_id)
+        except (User.DoesNotExist, ValidationError, ValueError):
+            raise InvalidTokenError()
+        remember_resolved_user(user)
+        user_issued_at = issued_at_watermark(user.issued_at, user.is_active)
+        add_issued_at_watermarks({user_id: user_issued_at})
+    return user_issued_at
+
+
+def get_users_issued_at(user_ids):
+    """
+    Batch version of `get_user_issued_at`, with one cache read and at most
+    one query. Unknown users are left out.
+    """
+    user_issued_at = get_issued_at_watermarks(user_ids)
+    missing = []
+    for user_id in set(user_ids) - set(user_issued_at):
+        try:
+            missing.append(uuid.UUID(str(user_id)))
+        except ValueError:
+            continue
+    if missing:
+        User = get_user_model()  # noqa: N806
+        rows = User.objects.filter(pk__in=missing).values_list(
+            "pk", "issued_at", "is_active"
+        )
+        user_issued_at.update(
+            add_issued_at_watermarks(
+                {
+                    str(pk): issued_at_watermark(issued_at, is_active)
+                    for pk, issued_at, is_active in rows
+                }
+            )
+        )
+    return user_issued_at
 
 
 def jwt_get_secret_key(payload=None):
@@ -24,9 +112,9 @@ def jwt_get_secret_key(payload=None):
         - etc.
     """
     if api_settings.JWT_GET_USER_SECRET_KEY:
-        User = get_user_model()  # noqa: N806
-        user = User.objects.get(pk=payload.get("id"))
-        key = str(api_settings.JWT_GET_USER_SECRET_KEY(user))
+        key = user_secrets.get(payload.get("id"))
+        if key is None:
+            raise InvalidTokenError()
         return key
     return api_settings.JWT_SECRET_KEY
 
@@ -39,6 +127,7 @@ def jwt_payload_handler(user, orig_iat=None):
         "id": user.pk,
         "username": username,
         "exp": datetime.utcnow() + api_settings.JWT_EXPIRATION_DELTA,
+        "jti": str(uuid.uuid4()),
     }
     if hasattr(user, "email"):
         payload["email"] = user.email
@@ -69,40 +158,162 @@ def jwt_get_user_id_from_payload_handler(payload):
 
 
 def jwt_encode_handler(payload):
+    signing_key = get_key_ring().signing_key
+    if signing_key is not None:
+        return jwt.encode(
+            payload,
+            signing_key.private_key,
+            signing_key.algorithm,
+            headers={"kid": signing_key.kid},
+        ).decode("utf-8")
     key = api_settings.JWT_PRIVATE_KEY or jwt_get_secret_key(payload)
     return jwt.encode(payload, key, api_settings.JWT_ALGORITHM).decode("utf-8")
 
 
-def jwt_decode_handler(token):
-    options = {"verify_exp": api_settings.JWT_VERIFY_EXPIRATION}
-    # get user from token, BEFORE verification, to get user secret key
-    unverified_payload = jwt.decode(token, None, False)
-    secret_key = jwt_get_secret_key(unverified_payload)
-    verified_payload = jwt.decode(
+class SinglePassJWT(jwt.PyJWT):
+    """
+    PyJWT parsing the token once: the signing key is resolved from the
+    parsed header and payload, then only the signature and the claims are
+    checked. Relies on the PyJWS/PyJWT internals of the pinned PyJWT.
+    """
+
+    def decode_resolving_key(
+        self, token, get_key, verify=True, algorithms=None, options=None, **kwargs
+    ):
+        payload_segment, signing_input, header, signature = self._load(token)
+        self._validate_headers(header)
+        try:
+            payload = json.loads(payload_segment.decode("utf-8"))
+        except ValueError as e:
+            raise DecodeError("Invalid payload string: %s" % e)
+        if not isinstance(payload, Mapping):
+            raise DecodeError("Invalid payload string: must be a json object")
+
+        if verify:
+            key = get_key(header, payload)
+            self._verify_signature(
+                payload_segment, signing_input, header, signature, key, algorithms
+            )
+            self._validate_claims(payload, merge_dict(self.options, options), **kwargs)
+        return payload
+
+
+_jwt = SinglePassJWT()
+
+
+def jwt_get_verification_key(header, payload):
+    """
+    Return the key verifying a token: the key ring entry named by its `kid`
+    header, or the configured public key or secret.
+    """
+    key_ring = get_key_ring()
+    if key_ring and "kid" in header:
+        signing_key = key_ring.get(header["kid"])
+        if signing_key is None:
+            raise InvalidTokenError("Unknown key id")
+        if header.get("alg") != signing_key.algorithm:
+            raise InvalidAlgorithmError("The specified alg value is not allowed")
+        return signing_key.public_key
+    if header.get("alg") != api_settings.JWT_ALGORITHM:
+        raise InvalidAlgorithmError("The specified alg value is not allowed")
+    return api_settings.JWT_PUBLIC_KEY or jwt_get_secret_key(payload)
+
+
+def decode_token(token):
+    """
+    Verify the signature and claims of `token` and return its payload.
+    """
+    return _jwt.decode_resolving_key(
         token,
-        api_settings.JWT_PUBLIC_KEY or secret_key,
+        jwt_get_verification_key,
         api_settings.JWT_VERIFY,
-        options=options,
+        options={"verify_exp": api_settings.JWT_VERIFY_EXPIRATION},
         leeway=api_settings.JWT_LEEWAY,
         audience=api_settings.JWT_AUDIENCE,
         issuer=api_settings.JWT_ISSUER,
-        algorithms=[api_settings.JWT_ALGORITHM],
+        algorithms=[api_settings.JWT_ALGORITHM] + get_key_ring().algorithms,
     )
-    User = get_user_model()  # noqa: N806
-    user = User.objects.get(pk=verified_payload.get("id"))
-    user_issued_at = timegm(user.issued_at.utctimetuple())
+
+
+def get_secret_version(user_id):
+    """
+    Return the version of the signing secret of `user_id`, or None if tokens
+    aren't signed with per-user secrets.
+    """
+    if api_settings.JWT_GET_USER_SECRET_KEY:
+        return get_user_version(user_id)
+    return None
+
+
+def get_verified_payload(token):
+    """
+    Return the payload cached for `token` if it was verified under the
+    current secret of its user, or None.
+    """
+    entry = verified_tokens.get(token)
+    if entry is None:
+        return None
+    payload, version = entry
+    if version != get_secret_version(payload.get("id")):
+        return None
+    return payload
+
+
+def jwt_decode_handler(token):
+    if isinstance(token, bytes):
+        token = token.decode()
+    verified_payload = get_verified_payload(token)
+    cached = verified_payload is not None
+    if not cached:
+        verified_payload = decode_token(token)
+    user_issued_at = get_user_issued_at(verified_payload.get("id"))
     if verified_payload.get('orig_iat') < user_issued_at:
         raise InvalidTokenError()
-    try:
-        if isinstance(token, bytes):
-            token = token.decode()
-        token_denied = user.denied_tokens.get(token=token)
-        if token_denied:
-            raise InvalidTokenError()
-    except DeniedToken.DoesNotExist:
-        return verified_payload
+    if denylist.is_denied(token, verified_payload):
+        raise InvalidTokenError()
+    if not cached:
+        verified_tokens.set(
+            token, verified_payload, get_secret_version(verified_payload.get("id"))
+        )
+    return verified_payload
+
+
+def jwt_decode_many(tokens):
+    """
+    Batch version of `jwt_decode_handler`, resolving the users and deny list
+    entries of all `tokens` at once. Returns, in order, the payload of each
+    token or the `InvalidTokenError` rejecting it.
+    """
+    results = []
+    decoded = set()
+    for token in tokens:
+        payload = get_verified_payload(token)
+        if payload is None:
+            try:
+                payload = decode_token(token)
+            except InvalidTokenError as e:
+                payload = e
+            else:
+                decoded.add(len(results))
+        results.append(payload)
 
+    verified = [i for i, result in enumerate(results) if isinstance(result, dict)]
+    users_issued_at = get_users_issued_at({results[i].get("id") for i in verified})
+    for i in verified:
+        user_issued_at = users_issued_at.get(results[i].get("id"))
+        if user_issued_at is None or results[i].get("orig_iat") < user_issued_at:
+            results[i] = InvalidTokenError()
 
+    verified = [i for i, result in enumerate(results) if isinstance(result, dict)]
+    denied = denylist.denied([(tokens[i], results[i]) for i in verified])
+    for i in verified:
+        if token_jti(tokens[i], results[i]) in denied:
+            results[i] = InvalidTokenError()
+        elif i in decoded:
+            verified_tokens.set(
+                tokens[i], results[i], get_secret_version(results[i].get("id"))
+            )
+    return results
 
 
 def jwt_response_payload_handler(token, user=None, request=None):
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import ugettext as _
+from rest_framework import exceptions
+from rest_framework_jwt import authentication
+from rest_framework_jwt.settings import api_settings
+
+from project.users.auth import get_resolved_user
+
+jwt_get_user_id_from_payload = api_settings.JWT_PAYLOAD_GET_USER_ID_HANDLER
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    Authenticated user whose row is only loaded when an attribute other
+    than its id is used.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, func):
+        super().__init__(func)
+        object.__setattr__(self, "pk", user_id)
+        object.__setattr__(self, "id", user_id)
+
+    def __bool__(self):
+        return True
+
+
+def load_user(user_id):
+    """
+    Return the active user `user_id`, reusing the one resolved while
+    decoding the token if any.
+    """
+    user = get_resolved_user(user_id)
+    if user is None:
+        User = get_user_model()  # noqa: N806
+        try:
+            user = User.objects.select_related("profile").get(pk=user_id)
+        except User.DoesNotExist:
+            msg = _("Invalid signature.")
+            raise exceptions.AuthenticationFailed(msg)
+
+    if not user.is_active:
+        msg = _("User account is disabled.")
+        raise exceptions.AuthenticationFailed(msg)
+
+    return user
+
+
+class JSONWebTokenAuthentication(authentication.JSONWebTokenAuthentication):
+    """
+    JWT authentication deferring the user lookup until the view needs it.
+    The token is validated from its payload and cached user state by
+    `jwt_decode_handler`.
+    """
+
+    def authenticate_credentials(self, payload):
+        user_id = jwt_get_user_id_from_payload(payload)
+        if not user_id:
+            msg = _("Invalid payload.")
+            raise exceptions.AuthenticationFailed(msg)
+
+        return LazyUser(user_id, lambda: load_user(user_id))
@@ -0,0 +1,277 @@
+"""Users caches.
+
+Per-process LRU caches sparing the database on the authentication hot
+path. Entries shared through the Django cache are keyed by a per-user
+version stored there, so bumping it invalidates them in every worker.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from calendar import timegm
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework_jwt.settings import api_settings
+
+from project.users.etags import user_versions
+
+USER_VERSION_CACHE_KEY = "user_version:{}"
+USER_SECRET_CACHE_KEY = "user_secret:{}:{}"
+USER_ISSUED_AT_CACHE_KEY = "user_issued_at:{}"
+USER_REPRESENTATION_CACHE_KEY = "user_representation:{}"
+
+
+class LRUCache:
+    """Thread-safe mapping keeping at most `maxsize` recently used entries."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return default
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def remove_if(self, predicate):
+        """Remove the entries whose value matches `predicate`."""
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if predicate(v)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_user_version(user_id):
+    """
+    Return the current version of the entries cached for `user_id`.
+
+    A missing version gets a fresh one, so entries cached before it was
+    evicted can't be mistaken for current ones. Versions expire with the
+    entries they key, so unknown ids don't pile up in the cache.
+    """
+    key = USER_VERSION_CACHE_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(
+            key, uuid.uuid4().hex, timeout=settings.JWT_USER_SECRET_CACHE_TIMEOUT
+        )
+        version = cache.get(key) or uuid.uuid4().hex
+    return version
+
+
+def _set_user_version(user_id):
+    cache.set(
+        USER_VERSION_CACHE_KEY.format(user_id),
+        uuid.uuid4().hex,
+        timeout=settings.JWT_USER_SECRET_CACHE_TIMEOUT,
+    )
+
+
+def bump_user_version(user_id):
+    """
+    Invalidate every entry cached for `user_id`, in every worker, now and
+    once the transaction commits, so entries a concurrent worker built
+    from the previously committed row meanwhile are dropped too.
+    """
+    _set_user_version(user_id)
+    transaction.on_commit(lambda: _set_user_version(user_id))
+
+
+# Watermark of disabled users, rejecting all of their tokens.
+DISABLED_WATERMARK = float("inf")
+
+
+def issued_at_watermark(issued_at, is_active=True):
+    """Return the epoch before which tokens of a user are rejected."""
+    if not is_active:
+        return DISABLED_WATERMARK
+    return timegm(issued_at.utctimetuple())
+
+
+def get_issued_at_watermark(user_id):
+    """
+    Return the epoch before which tokens of `user_id` are rejected, or None
+    if it isn't cached.
+    """
+    return cache.get(USER_ISSUED_AT_CACHE_KEY.format(user_id))
+
+
+def get_issued_at_watermarks(user_ids):
+    """Return the cached watermarks of `user_ids`, keyed by user id."""
+    keys = {USER_ISSUED_AT_CACHE_KEY.format(user_id): user_id for user_id in user_ids}
+    return {keys[key]: value for key, value in cache.get_many(keys).items()}
+
+
+def add_issued_at_watermarks(watermarks):
+    """
+    Cache the watermarks of a {user id: watermark} mapping read from the
+    database, unless a committed change already cached newer ones.
+    """
+    for user_id, watermark in watermarks.items():
+        cache.add(
+            USER_ISSUED_AT_CACHE_KEY.format(user_id),
+            watermark,
+            timeout=settings.USER_ISSUED_AT_CACHE_TIMEOUT,
+        )
+    return watermarks
+
+
+def update_issued_at_watermark(user_id, watermark=None):
+    """
+    Replace the cached watermark of `user_id` once the transaction saving it
+    commits, or drop it if `watermark` is None.
+
+    The entry is also dropped right away, so the transaction reads its own
+    change. A concurrent miss may cache the committed value meanwhile,
+    which the commit overwrites.
+    """
+    key = USER_ISSUED_AT_CACHE_KEY.format(user_id)
+    cache.delete(key)
+    if watermark is None:
+        transaction.on_commit(lambda: cache.delete(key))
+    else:
+        transaction.on_commit(
+            lambda: cache.set(
+                key, watermark, timeout=settings.USER_ISSUED_AT_CACHE_TIMEOUT
+            )
+        )
+
+
+class UserSecretCache:
+    """
+    Signing secrets returned by `JWT_GET_USER_SECRET_KEY`, so verifying a
+    token costs a cache read instead of a user query.
+    """
+
+    def __init__(self):
+        self._local = LRUCache(settings.JWT_USER_SECRET_CACHE_SIZE)
+
+    def _load(self, user_id):
+        User = get_user_model()  # noqa: N806
+        try:
+            user = User.objects.get(pk=user_id)
+        except (User.DoesNotExist, ValidationError, ValueError):
+            return ""
+        return str(api_settings.JWT_GET_USER_SECRET_KEY(user))
+
+    def get(self, user_id):
+        """Return the secret of `user_id`, or None if there is no such user."""
+        version = get_user_version(user_id)
+        secret = self._local.get((user_id, version))
+        if secret is None:
+            key = USER_SECRET_CACHE_KEY.format(user_id, version)
+            secret = cache.get(key)
+            if secret is None:
+                secret = self._load(user_id)
+                cache.set(key, secret, timeout=settings.JWT_USER_SECRET_CACHE_TIMEOUT)
+            self._local.set((user_id, version), secret)
+        return secret or None
+
+
+user_secrets = UserSecretCache()
+
+
+class VerificationCache:
+    """
+    Payloads of tokens this worker verified recently, so repeated calls
+    with the same token skip the signature and claims checks.
+
+    An entry lives until the earlier of the token expiry and
+    `VERIFIED_TOKEN_CACHE_TIMEOUT` seconds. It records the user version it
+    was verified under; callers still check the shared issued_at
+    watermark and deny list on a hit, so a change made in any worker
+    applies right away. Revoking the token or changing the user's
+    credentials also drops it in this worker.
+    """
+
+    def __init__(self):
+        self._local = LRUCache(settings.VERIFIED_TOKEN_CACHE_SIZE)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, token):
+        if isinstance(token, str):
+            token = token.encode()
+        return hashlib.sha256(token).digest()
+
+    def get(self, token):
+        """
+        Return a copy of the payload verified for `token` and the user
+        version it was verified under, or None.
+        """
+        entry = self._local.get(self._key(token))
+        if entry is None or entry[1] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(entry[0]), entry[2]
+
+    def set(self, token, payload, version=None):
+        expires_at = time.time() + settings.VERIFIED_TOKEN_CACHE_TIMEOUT
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, int(payload["exp"]))
+        self._local.set(self._key(token), (dict(payload), expires_at, version))
+
+    def discard(self, token):
+        self._local.pop(self._key(token))
+
+    def discard_user(self, user_id):
+        user_id = str(user_id)
+        self._local.remove_if(lambda entry: str(entry[0].get("id")) == user_id)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+verified_tokens = VerificationCache()
+
+
+class RepresentationCache:
+    """
+    Serialized users, stamped with the `modified` timestamps of the user
+    and its profile they were built from. Saving either deletes the entry,
+    and an entry whose stamp doesn't match the instance is rebuilt.
+    """
+
+    def _key(self, user_id):
+        return USER_REPRESENTATION_CACHE_KEY.format(user_id)
+
+    def get(self, user, build):
+        """Return the representation of `user`, built by `build(user)` on a miss."""
+        key = self._key(user.pk)
+        stamp = user_versions(user)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        data = build(user)
+        cache.set(key, (stamp, data), timeout=settings.USER_REPRESENTATION_CACHE_TIMEOUT)
+        return data
+
+    def invalidate(self, user_id):
+        cache.delete(self._key(user_id))
+
+
+user_representations = RepresentationCache()
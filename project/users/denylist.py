@@ -0,0 +1,230 @@
+"""Token deny list.
+
+Revoked tokens are kept in the configured cache, with a timeout matching
+the token expiry, behind a per-worker Bloom filter so valid tokens are
+accepted without a network round trip. The denied_token table stays the
+durable source: it fills the filter when a worker starts, the filter is
+topped up from it whenever another worker revokes a token, and it answers
+lookups the cache has lost.
+"""
+import hashlib
+import math
+import threading
+import time
+import uuid
+from calendar import timegm
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_jwt.settings import api_settings
+
+from project.users.caches import verified_tokens
+from project.users.models.deniedtokens import DeniedToken
+
+CACHE_KEY = "denied_token:{}"
+VERSION_CACHE_KEY = "denied_token:version"
+
+# Revocations are picked up from rows created slightly before the last
+# sync, so a row committed late by another worker is not missed.
+SYNC_MARGIN = timedelta(minutes=5)
+
+
+def token_jti(token, payload):
+    """
+    Return the fixed-size identifier a token is deny-listed under: its `jti`
+    claim, or a UUID built from the SHA-256 digest of tokens issued without one.
+    """
+    if payload.get("jti"):
+        return str(uuid.UUID(payload["jti"]))
+    if isinstance(token, str):
+        token = token.encode()
+    return str(uuid.UUID(bytes=hashlib.sha256(token).digest()[:16]))
+
+
+def token_timeout(payload):
+    """Seconds until the token in `payload` expires, at least one."""
+    exp = payload.get("exp")
+    if exp is None:
+        return None
+    now = timegm(datetime.utcnow().utctimetuple())
+    return max(int(exp) - now, 1)
+
+
+def token_expiry(payload):
+    """Aware datetime at which the token in `payload` expires."""
+    return datetime.fromtimestamp(int(payload["exp"]), tz=timezone.utc)
+
+
+def purge_expired(batch_size):
+    """
+    Delete denied tokens that signature verification rejects anyway, in
+    batches of `batch_size` rows so no lock is held for long. Returns the
+    number of rows deleted.
+    """
+    leeway = api_settings.JWT_LEEWAY
+    if not isinstance(leeway, timedelta):
+        leeway = timedelta(seconds=leeway)
+    expired = DeniedToken.objects.filter(
+        expires_at__lt=timezone.now() - leeway
+    ).order_by()
+
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(expired.values_list("pk", flat=True)[:batch_size])
+            if batch:
+                count, _ = DeniedToken.objects.filter(pk__in=batch).delete()
+                deleted += count
+        if len(batch) < batch_size:
+            return deleted
+
+
+class BloomFilter:
+    """Bit array answering "maybe present" or "definitely absent"."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = int(
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(
+            int(round(self.size / capacity * math.log(2))), 1
+        )
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.sha256(key.encode()).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class DenyList:
+    """Per-worker view of the revoked tokens."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._version = None
+        self._checked_at = 0.0
+        self._synced_at = None
+
+    def _new_filter(self, rows):
+        capacity = max(settings.DENYLIST_BLOOM_CAPACITY, 2 * rows)
+        return BloomFilter(capacity, settings.DENYLIST_BLOOM_ERROR_RATE)
+
+    def _load(self, since=None):
+        tokens = DeniedToken.objects.all()
+        if since is not None:
+            tokens = tokens.filter(created__gte=since - SYNC_MARGIN)
+        return tokens.values_list("jti", flat=True).iterator()
+
+    def _rebuild(self):
+        self._synced_at = timezone.now()
+        bloom = self._new_filter(DeniedToken.objects.count())
+        for jti in self._load():
+            bloom.add(str(jti))
+        self._filter = bloom
+
+    def _sync(self):
+        """Rebuild the filter on first use, then follow other workers."""
+        now = time.monotonic()
+        if (
+            self._filter is not None
+            and now - self._checked_at < settings.DENYLIST_SYNC_INTERVAL
+        ):
+            return
+        with self._lock:
+            self._checked_at = now
+            version = cache.get(VERSION_CACHE_KEY)
+            if self._filter is None or self._filter.count > self._filter.capacity:
+                self._rebuild()
+            elif version != self._version:
+                since, self._synced_at = self._synced_at, timezone.now()
+                for jti in self._load(since):
+                    self._filter.add(str(jti))
+            self._version = version
+
+    def _bump_version(self):
+        try:
+            cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+
+    def is_denied(self, token, payload):
+        """Return whether `token`, already verified into `payload`, was revoked."""
+        self._sync()
+        jti = token_jti(token, payload)
+        if jti not in self._filter:
+            return False
+
+        key = CACHE_KEY.format(jti)
+        denied = cache.get(key)
+        if denied is None:
+            denied = DeniedToken.objects.filter(jti=jti).exists()
+            cache.set(key, denied, timeout=token_timeout(payload))
+        return denied
+
+    def denied(self, tokens):
+        """
+        Return the jtis revoked among `tokens`, a list of verified (token,
+        payload) pairs, with one cache read and at most one query.
+        """
+        self._sync()
+        payloads = {token_jti(token, payload): payload for token, payload in tokens}
+        keys = {CACHE_KEY.format(jti): jti for jti in payloads if jti in self._filter}
+        if not keys:
+            return set()
+
+        cached = {keys[key]: value for key, value in cache.get_many(keys).items()}
+        denied = {jti for jti, value in cached.items() if value}
+        missing = set(keys.values()) - set(cached)
+        if missing:
+            stored = {
+                str(jti)
+                for jti in DeniedToken.objects.filter(jti__in=missing).values_list(
+                    "jti", flat=True
+                )
+            }
+            for jti in missing:
+                cache.set(
+                    CACHE_KEY.format(jti),
+                    jti in stored,
+                    timeout=token_timeout(payloads[jti]),
+                )
+            denied |= stored
+        return denied
+
+    def deny(self, token, payload):
+        """Store a revocation and write it through to the filter and the cache."""
+        self._sync()
+        jti = token_jti(token, payload)
+        DeniedToken.objects.get_or_create(
+            user_id=payload["id"],
+            jti=jti,
+            defaults={"expires_at": token_expiry(payload)},
+        )
+        with self._lock:
+            self._filter.add(jti)
+        cache.set(CACHE_KEY.format(jti), True, timeout=token_timeout(payload))
+        verified_tokens.discard(token)
+        transaction.on_commit(self._bump_version)
+
+
+denylist = DenyList()
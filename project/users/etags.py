@@ -0,0 +1,150 @@
+"""User resource validators.
+
+A user's representation changes only when the user or its profile is
+saved, so its ETag is built from both `modified` timestamps, as hex
+microseconds since the epoch. The ETag can be parsed back into the
+timestamps, so writes sent with `If-Match` are made with a single UPDATE
+matching them, answered with a 412 when another write came first.
+"""
+from calendar import timegm
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.cache import parse_etags
+from django.utils.http import http_date
+from rest_framework import exceptions, status
+
+from project.users.models import Profile, User
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class PreconditionFailed(exceptions.APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource was modified since it was retrieved."
+    default_code = "precondition_failed"
+
+
+def _microseconds(value):
+    if value is None:
+        return 0
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10 ** 6 + delta.microseconds
+
+
+def _datetime(microseconds):
+    if not microseconds:
+        return None
+    return EPOCH + timedelta(microseconds=microseconds)
+
+
+def user_versions(user):
+    """Return the modified timestamps of `user` and its profile."""
+    try:
+        profile_modified = user.profile.modified
+    except ObjectDoesNotExist:
+        profile_modified = None
+    return user.modified, profile_modified
+
+
+def user_etag(user_modified, profile_modified):
+    return '"%x.%x"' % (_microseconds(user_modified), _microseconds(profile_modified))
+
+
+def parse_user_etag(etag):
+    """
+    Return the (user, profile) modified timestamps of a `user_etag`, or None
+    if `etag` isn't one.
+    """
+    bits = etag.strip().strip('"').split(".")
+    if len(bits) != 2:
+        return None
+    try:
+        user_modified, profile_modified = (int(bit, 16) for bit in bits)
+    except ValueError:
+        return None
+    return _datetime(user_modified), _datetime(profile_modified)
+
+
+def last_modified(user_modified, profile_modified):
+    """Return the epoch of the latest of the two timestamps."""
+    latest = max(value for value in (user_modified, profile_modified) if value)
+    return timegm(latest.utctimetuple())
+
+
+def set_user_validators(response, versions):
+    """Set the ETag and Last-Modified headers of a user `response`."""
+    response["ETag"] = user_etag(*versions)
+    response["Last-Modified"] = http_date(last_modified(*versions))
+    return response
+
+
+def if_match_versions(request):
+    """
+    Return the timestamps of the ETag in the `If-Match` header of `request`,
+    or None if there is no precondition. Raises `PreconditionFailed` if the
+    header doesn't hold a single user ETag.
+    """
+    header = request.META.get("HTTP_IF_MATCH", "").strip()
+    if not header or header == "*":
+        return None
+    etags = parse_etags(header)
+    versions = parse_user_etag(etags[0]) if len(etags) == 1 else None
+    if versions is None:
+        raise PreconditionFailed()
+    return versions
+
+
+def user_condition(user_modified, profile_modified):
+    """
+    Return the condition of a users UPDATE matching both timestamps.
+
+    The user's own timestamp is checked on the updated row and the
+    profile's through a subquery, rather than a join: a joined condition is
+    compiled into a subquery that PostgreSQL doesn't check again once a
+    concurrent writer of the row commits, so both writes would succeed.
+    """
+    profiles = Profile.objects.values("user_id")
+    if profile_modified is None:
+        return Q(modified=user_modified) & ~Q(pk__in=profiles)
+    return Q(modified=user_modified, pk__in=profiles.filter(modified=profile_modified))
+
+
+def profile_condition(user_modified, profile_modified):
+    """Return the condition of a profiles UPDATE matching both timestamps."""
+    users = User.objects.filter(modified=user_modified).values("pk")
+    return Q(modified=profile_modified, user_id__in=users)
+
+
+def conditional_update(instance, data, condition):
+    """
+    Save the `data` fields of `instance` with one UPDATE of its row, if it
+    also matches the `condition` Q object, bumping `modified`. Post save
+    signals aren't sent. Raises `PreconditionFailed` if no row matched.
+    """
+    model = instance._meta.model
+    uncommitted_files = []
+    for name, value in data.items():
+        setattr(instance, name, value)
+        field = model._meta.get_field(name)
+        if isinstance(field, models.FileField):
+            file = getattr(instance, field.attname)
+            if file and not file._committed:
+                uncommitted_files.append(file)
+
+    values = {}
+    for name in list(data) + ["modified"]:
+        field = model._meta.get_field(name)
+        # Stores new files and sets the auto_now timestamp.
+        values[field.attname] = field.pre_save(instance, False)
+
+    updated = model._default_manager.filter(condition, pk=instance.pk).update(
+        **values
+    )
+    if not updated:
+        for file in uncommitted_files:
+            file.delete(save=False)
+        raise PreconditionFailed()
@@ -0,0 +1,88 @@
+"""Users filters.
+
+User search matches every word of the query in the username, email,
+first or last name, case insensitively: anywhere in the value and, on
+PostgreSQL, also fuzzily, when the value is similar enough to the word
+for pg_trgm's `%` operator. Both the `UPPER(column) LIKE '%WORD%'` and
+`UPPER(column) % UPPER('word')` lookups are served by the pg_trgm GIN
+indexes of migration 0011. Words shorter than three characters have no
+trigram to look up and would scan the whole table, so they are ignored.
+"""
+from functools import reduce
+from operator import and_, or_
+
+from django.db import connections
+from django.db.models import CharField, Lookup, Q
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_FIELDS = ("username", "email", "first_name", "last_name")
+MIN_SEARCH_WORD_LENGTH = 3
+
+
+@CharField.register_lookup
+class UpperTrigramSimilar(Lookup):
+    """
+    `UPPER(column::text) % UPPER(value)`, matching the expression of the
+    trigram indexes. PostgreSQL with pg_trgm only.
+    """
+
+    lookup_name = "upper_trigram_similar"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return "UPPER(%s::text) %%%% UPPER(%s)" % (lhs, rhs), lhs_params + rhs_params
+
+
+def search_words(query):
+    """Return the words of `query` long enough to be searched."""
+    return [word for word in query.split() if len(word) >= MIN_SEARCH_WORD_LENGTH]
+
+
+def search_users(queryset, query, prefix=""):
+    """
+    Filter `queryset` down to the users matching `query`. `prefix` is the
+    lookup path to the user, e.g. "user__" for profiles.
+    """
+    words = search_words(query)
+    if not words:
+        return queryset
+    lookups = ["icontains"]
+    if connections[queryset.db].vendor == "postgresql":
+        lookups.append("upper_trigram_similar")
+    return queryset.filter(
+        reduce(
+            and_,
+            (
+                reduce(
+                    or_,
+                    (
+                        Q(**{"%s%s__%s" % (prefix, field, lookup): word})
+                        for field in SEARCH_FIELDS
+                        for lookup in lookups
+                    ),
+                )
+                for word in words
+            ),
+        )
+    )
+
+
+class UserSearchFilter(BaseFilterBackend):
+    """Filter users with the `search` query parameter."""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if query.strip() and not search_words(query):
+            raise serializers.ValidationError(
+                {
+                    self.search_param: [
+                        "Search words must be at least %d characters long."
+                        % MIN_SEARCH_WORD_LENGTH
+                    ]
+                }
+            )
+        return search_users(queryset, query)
@@ -0,0 +1,453 @@
+"""Password hashers.
+
+Argon2 hashing runs on a small per-process thread pool with a bounded
+queue, admitted by slots shared by every worker process through
+`PASSWORD_HASHING_SLOTS_BACKEND`, so a burst of logins and signups can't
+occupy every request thread. Once the slots are taken, hashing fails fast
+with `PasswordHashingBusy`, answered with a 503 by the API exception
+handler. The backend also counts hashes and rejections, reported by the
+`password_hashing_stats` command.
+
+The Argon2 parameters are calibrated explicitly, by running the
+`calibrate_password_hasher` command once on hardware like the replicas',
+to hash within `ARGON2_TARGET_MS` using at most `ARGON2_MAX_MEMORY_KIB`.
+Every process must hash with the same parameters, or `must_update` would
+rehash a password on each login served by a differently calibrated
+replica, so they are deployed through the `ARGON2_TIME_COST`,
+`ARGON2_MEMORY_COST` and `ARGON2_PARALLELISM` settings, falling back to
+the `ARGON2_PARAMETERS_FILE` recorded by the command, which must then be
+on storage shared by every replica, and to Django's defaults. Hashes made
+with other parameters are upgraded on the next login.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password hashing pool can't take more work."""
+
+
+PASSWORD_HASHING_SLOTS_KEY = "password_hashing:slots"
+PASSWORD_HASHING_STATS_KEY = "password_hashing:stats"
+
+# Take a slot unless `limit` unexpired ones are taken.
+# KEYS: slots sorted set, scored by expiry in milliseconds.
+# ARGV: now in milliseconds, lease in milliseconds, limit, slot id.
+ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], tonumber(ARGV[1]) + tonumber(ARGV[2]), ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+class HashingSlots:
+    """
+    Base class of the password hashing admission backends, bounding the
+    hashes in progress across every worker process and counting them.
+    """
+
+    def acquire(self, limit, lease):
+        """
+        Take one of `limit` slots for at most `lease` seconds and return its
+        id, or return None if they are all taken.
+        """
+        raise NotImplementedError
+
+    def release(self, slot, elapsed):
+        """Free `slot`, counting a hash that took `elapsed` seconds."""
+        raise NotImplementedError
+
+    def reject(self):
+        """Count a hash rejected for lack of a slot."""
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    def reset(self):
+        """Reset the counters."""
+        raise NotImplementedError
+
+
+class LocalHashingSlots(HashingSlots):
+    """Slots and counters kept in the memory of the current process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._taken = 0
+        self.reset()
+
+    def acquire(self, limit, lease):
+        with self._lock:
+            if self._taken >= limit:
+                return None
+            self._taken += 1
+            return uuid.uuid4().hex
+
+    def release(self, slot, elapsed):
+        with self._lock:
+            self._taken -= 1
+            self._stats["hashes"] += 1
+            self._stats["hash_seconds"] += elapsed
+
+    def reject(self):
+        with self._lock:
+            self._stats["rejected"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_progress=self._taken)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {"hashes": 0, "rejected": 0, "hash_seconds": 0.0}
+
+
+class RedisHashingSlots(HashingSlots):
+    """
+    Slots kept in the Redis server of the default cache, taken atomically
+    by a Lua script. Slots of crashed workers free up once their lease
+    expires. Hashing is let through if Redis is down.
+    """
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+
+        self._redis = get_redis_connection("default")
+        self._script = self._redis.register_script(ACQUIRE_SLOT_SCRIPT)
+
+    def acquire(self, limit, lease):
+        slot = uuid.uuid4().hex
+        args = [int(time.time() * 1000), int(lease * 1000), limit, slot]
+        try:
+            taken = self._script(keys=[PASSWORD_HASHING_SLOTS_KEY], args=args)
+        except Exception:
+            logger.exception("Password hashing slots unavailable, allowing hash.")
+            return slot
+        return slot if taken else None
+
+    def release(self, slot, elapsed):
+        try:
+            pipe = self._redis.pipeline()
+            pipe.zrem(PASSWORD_HASHING_SLOTS_KEY, slot)
+            pipe.hincrby(PASSWORD_HASHING_STATS_KEY, "hashes", 1)
+            pipe.hincrbyfloat(PASSWORD_HASHING_STATS_KEY, "hash_seconds", elapsed)
+            pipe.execute()
+        except Exception:
+            logger.exception("Password hashing slots unavailable.")
+
+    def reject(self):
+        try:
+            self._redis.hincrby(PASSWORD_HASHING_STATS_KEY, "rejected", 1)
+        except Exception:
+            logger.exception("Password hashing slots unavailable.")
+
+    def stats(self):
+        pipe = self._redis.pipeline()
+        pipe.zcount(PASSWORD_HASHING_SLOTS_KEY, int(time.time() * 1000), "+inf")
+        pipe.hgetall(PASSWORD_HASHING_STATS_KEY)
+        in_progress, counters = pipe.execute()
+        counters = {k.decode(): float(v) for k, v in counters.items()}
+        return {
+            "hashes": int(counters.get("hashes", 0)),
+            "rejected": int(counters.get("rejected", 0)),
+            "hash_seconds": counters.get("hash_seconds", 0.0),
+            "in_progress": in_progress,
+        }
+
+    def reset(self):
+        self._redis.delete(PASSWORD_HASHING_STATS_KEY)
+
+
+_hashing_slots = None
+_hashing_slots_lock = threading.Lock()
+
+
+def get_hashing_slots():
+    global _hashing_slots
+    with _hashing_slots_lock:
+        if _hashing_slots is None:
+            _hashing_slots = import_string(settings.PASSWORD_HASHING_SLOTS_BACKEND)()
+        return _hashing_slots
+
+
+def reset_hashing_slots(setting=None, **kwargs):
+    """Build the backend again on next use. Connected to `setting_changed`."""
+    global _hashing_slots
+    if setting in (None, "PASSWORD_HASHING_SLOTS_BACKEND"):
+        _hashing_slots = None
+
+
+class HashingPool:
+    """
+    Thread pool hashing passwords for the request threads of one process.
+
+    Hashing first takes one of the `PASSWORD_HASHING_MAX_CONCURRENCY` slots
+    shared by every process, then one of the `workers + queue_size` local
+    ones. Size the local slots below the request threads of a worker, so
+    some are always left for other endpoints.
+    """
+
+    def __init__(self, workers, queue_size, slots=None, limit=None, lease=None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hashing"
+        )
+        self._local_slots = threading.BoundedSemaphore(workers + queue_size)
+        self._slots = slots
+        self._limit = limit
+        self._lease = lease
+        self._lock = threading.Lock()
+        self.depth = 0
+        self.peak_depth = 0
+        self.hashes = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+        if self._slots is not None:
+            self._slots.reject()
+        logger.warning("Password hashing pool saturated, rejecting request.")
+        raise PasswordHashingBusy()
+
+    def run(self, func, *args):
+        """Run `func(*args)` on the pool and return its result."""
+        slot = None
+        if self._slots is not None:
+            slot = self._slots.acquire(self._limit, self._lease)
+            if slot is None:
+                self._reject()
+        if not self._local_slots.acquire(blocking=False):
+            if slot is not None:
+                self._slots.release(slot, 0.0)
+            self._reject()
+
+        with self._lock:
+            self.depth += 1
+            self.peak_depth = max(self.peak_depth, self.depth)
+        started = time.perf_counter()
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.depth -= 1
+                self.hashes += 1
+                self.hash_seconds += elapsed
+            self._local_slots.release()
+            if slot is not None:
+                self._slots.release(slot, elapsed)
+            logger.debug("Password hashed in %.1fms.", elapsed * 1000)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "depth": self.depth,
+                "peak_depth": self.peak_depth,
+                "hashes": self.hashes,
+                "rejected": self.rejected,
+                "average_ms": (
+                    self.hash_seconds / self.hashes * 1000 if self.hashes else 0.0
+                ),
+            }
+
+
+_hashing_pool = None
+_hashing_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    global _hashing_pool
+    with _hashing_pool_lock:
+        if _hashing_pool is None:
+            _hashing_pool = HashingPool(
+                settings.PASSWORD_HASHING_WORKERS,
+                settings.PASSWORD_HASHING_QUEUE_SIZE,
+                get_hashing_slots(),
+                settings.PASSWORD_HASHING_MAX_CONCURRENCY,
+                settings.PASSWORD_HASHING_SLOT_LEASE,
+            )
+        return _hashing_pool
+
+
+class BoundedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 hasher running on the bounded password hashing pool."""
+
+    # Hashes the same way without the pool, for batch jobs that mustn't
+    # take the slots of the web workers.
+    unbounded_class = Argon2PasswordHasher
+
+    def encode(self, password, salt):
+        return get_hashing_pool().run(super().encode, password, salt)
+
+    def verify(self, password, encoded):
+        return get_hashing_pool().run(super().verify, password, encoded)
+
+
+# Argon2 requires at least 8 KiB of memory per lane.
+ARGON2_MIN_MEMORY_KIB = 8
+
+
+def benchmark_argon2(time_cost, memory_cost, parallelism, rounds=3):
+    """Return the median milliseconds taken to hash with the given parameters."""
+    argon2 = Argon2PasswordHasher()._load_library()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        argon2.low_level.hash_secret(
+            b"calibration",
+            os.urandom(16),
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+            hash_len=argon2.DEFAULT_HASH_LENGTH,
+            type=argon2.low_level.Type.I,
+        )
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def default_argon2_parallelism():
+    """Share the CPUs between the hashing pool workers."""
+    return max(1, (os.cpu_count() or 1) // settings.PASSWORD_HASHING_WORKERS)
+
+
+def calibrate_argon2(target_ms=None, max_memory_kib=None, parallelism=None):
+    """
+    Return the Argon2 parameters hashing within `target_ms` on this host.
+
+    Memory is the costlier resource for an attacker, so the whole budget is
+    used unless a single pass already exceeds the target, in which case it
+    is halved until it fits. The remaining time is spent on passes.
+    """
+    target_ms = target_ms or settings.ARGON2_TARGET_MS
+    memory_cost = max_memory_kib or settings.ARGON2_MAX_MEMORY_KIB
+    parallelism = parallelism or default_argon2_parallelism()
+    min_memory_kib = ARGON2_MIN_MEMORY_KIB * parallelism
+    memory_cost = max(memory_cost, min_memory_kib)
+
+    elapsed = benchmark_argon2(1, memory_cost, parallelism)
+    while elapsed > target_ms and memory_cost // 2 >= min_memory_kib:
+        memory_cost //= 2
+        elapsed = benchmark_argon2(1, memory_cost, parallelism)
+
+    time_cost = max(1, int(target_ms // elapsed))
+    if time_cost > 1:
+        elapsed = benchmark_argon2(time_cost, memory_cost, parallelism)
+        while elapsed > target_ms and time_cost > 1:
+            time_cost -= 1
+            elapsed = benchmark_argon2(time_cost, memory_cost, parallelism)
+
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+        "elapsed_ms": round(elapsed, 1),
+        "target_ms": target_ms,
+        "calibrated_at": timezone.now().isoformat(),
+    }
+
+
+def load_argon2_parameters(path=None):
+    """Return the parameters recorded in `ARGON2_PARAMETERS_FILE`, or None."""
+    path = path or settings.ARGON2_PARAMETERS_FILE
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def record_argon2_parameters(parameters, path=None):
+    """Write `parameters` to `ARGON2_PARAMETERS_FILE`, replacing it atomically."""
+    path = path or settings.ARGON2_PARAMETERS_FILE
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, "w") as f:
+        json.dump(parameters, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    reset_argon2_parameters()
+
+
+_argon2_parameters = None
+_argon2_parameters_lock = threading.Lock()
+
+
+def get_argon2_parameters():
+    """
+    Return the Argon2 parameters: the `ARGON2_TIME_COST`,
+    `ARGON2_MEMORY_COST` and `ARGON2_PARALLELISM` settings, or the ones
+    recorded in `ARGON2_PARAMETERS_FILE`, or Django's defaults. Never
+    calibrates, see the `calibrate_password_hasher` command.
+    """
+    global _argon2_parameters
+    with _argon2_parameters_lock:
+        if _argon2_parameters is None:
+            parameters = load_argon2_parameters() or {
+                "time_cost": Argon2PasswordHasher.time_cost,
+                "memory_cost": Argon2PasswordHasher.memory_cost,
+                "parallelism": Argon2PasswordHasher.parallelism,
+            }
+            configured = {
+                "time_cost": settings.ARGON2_TIME_COST,
+                "memory_cost": settings.ARGON2_MEMORY_COST,
+                "parallelism": settings.ARGON2_PARALLELISM,
+            }
+            parameters.update(
+                (name, value) for name, value in configured.items() if value
+            )
+            _argon2_parameters = parameters
+        return _argon2_parameters
+
+
+def reset_argon2_parameters(setting=None, **kwargs):
+    """Read the parameters again on next use. Connected to `setting_changed`."""
+    global _argon2_parameters
+    if setting is None or setting.startswith("ARGON2_"):
+        _argon2_parameters = None
+
+
+class CalibratedArgon2Parameters:
+    """Argon2 hasher mixin using the calibrated parameters."""
+
+    @property
+    def time_cost(self):
+        return get_argon2_parameters()["time_cost"]
+
+    @property
+    def memory_cost(self):
+        return get_argon2_parameters()["memory_cost"]
+
+    @property
+    def parallelism(self):
+        return get_argon2_parameters()["parallelism"]
+
+
+class UnboundedCalibratedArgon2PasswordHasher(
+    CalibratedArgon2Parameters, Argon2PasswordHasher
+):
+    """Calibrated Argon2 hasher hashing on the calling thread."""
+
+
+class CalibratedArgon2PasswordHasher(
+    CalibratedArgon2Parameters, BoundedArgon2PasswordHasher
+):
+    """Bounded Argon2 hasher using the calibrated parameters."""
+
+    unbounded_class = UnboundedCalibratedArgon2PasswordHasher
@@ -0,0 +1,182 @@
+"""Bulk user import.
+
+Rows are streamed from a CSV or JSON lines file and loaded in chunks. Each
+chunk drops the rows whose email or username is invalid, repeated in the
+chunk or already taken, hashes the remaining passwords in a process pool
+and inserts the users and their profiles with one `bulk_create` each, in
+one transaction. A checkpoint is written after every chunk so an
+interrupted import resumes where it stopped.
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from project.users.models import Profile, User
+
+USER_FIELDS = ("email", "username", "first_name", "last_name", "phone_number")
+PROFILE_FIELDS = ("biography",)
+
+
+def read_rows(path, format=None):
+    """Yield the rows of a CSV or JSON lines file as dicts."""
+    format = format or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+    with open(path, newline="") as f:
+        if format == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def hash_password(password):
+    """
+    Return the hash of `password`, or an unusable one if it is empty. Made
+    by the default hasher without the password hashing pool, whose slots
+    are kept for the web workers.
+    """
+    hasher = get_hasher()
+    hasher = getattr(hasher, "unbounded_class", type(hasher))()
+    return make_password(password or None, hasher=hasher)
+
+
+def clean_row(row):
+    """Return the user and profile fields of `row`, or None if it is invalid."""
+    email = User.objects.normalize_email((row.get("email") or "").strip())
+    username = User.normalize_username((row.get("username") or "").strip())
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    if not username:
+        return None
+    user = {field: (row.get(field) or "").strip() for field in USER_FIELDS}
+    user.update(email=email, username=username)
+    profile = {field: row.get(field) or "" for field in PROFILE_FIELDS}
+    return user, profile, row.get("password")
+
+
+class Checkpoint:
+    """Progress of an import, saved next to the imported file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = self.created = self.skipped = 0
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            self.rows = state["rows"]
+            self.created = state["created"]
+            self.skipped = state["skipped"]
+        except FileNotFoundError:
+            pass
+        return self
+
+    def save(self):
+        tmp_path = "%s.tmp" % self.path
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"rows": self.rows, "created": self.created, "skipped": self.skipped},
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class UserImporter:
+    def __init__(self, chunk_size=1000, workers=None):
+        self.chunk_size = chunk_size
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+
+    def unique_rows(self, rows):
+        """Drop invalid rows and rows whose email or username is taken."""
+        cleaned = []
+        emails, usernames = set(), set()
+        for row in rows:
+            row = clean_row(row)
+            if row is None:
+                continue
+            email, username = row[0]["email"], row[0]["username"]
+            if email in emails or username in usernames:
+                continue
+            emails.add(email)
+            usernames.add(username)
+            cleaned.append(row)
+
+        taken_emails = set(
+            User.objects.filter(email__in=emails).values_list("email", flat=True)
+        )
+        taken_usernames = set(
+            User.objects.filter(username__in=usernames).values_list(
+                "username", flat=True
+            )
+        )
+        return [
+            row
+            for row in cleaned
+            if row[0]["email"] not in taken_emails
+            and row[0]["username"] not in taken_usernames
+        ]
+
+    def load_chunk(self, rows, hash_map):
+        """Insert the users and profiles of a chunk. Returns the users created."""
+        rows = self.unique_rows(rows)
+        passwords = hash_map(hash_password, [row[2] for row in rows])
+        users, profiles = [], []
+        for (user_fields, profile_fields, _), password in zip(rows, passwords):
+            user = User(
+                **user_fields, password=password, is_verified=False, is_client=True
+            )
+            users.append(user)
+            profiles.append(Profile(user=user, **profile_fields))
+
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            Profile.objects.bulk_create(profiles)
+        return len(users)
+
+    def run(self, rows, checkpoint, report=None):
+        """
+        Import `rows`, skipping those already imported according to
+        `checkpoint`, and call `report(checkpoint, rows_per_second)` after
+        every chunk.
+        """
+        rows = islice(rows, checkpoint.rows, None)
+        executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        hash_map = (
+            (lambda func, items: executor.map(func, items, chunksize=64))
+            if executor
+            else map
+        )
+        try:
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                started = time.perf_counter()
+                created = self.load_chunk(chunk, hash_map)
+                checkpoint.rows += len(chunk)
+                checkpoint.created += created
+                checkpoint.skipped += len(chunk) - created
+                checkpoint.save()
+                if report is not None:
+                    report(checkpoint, len(chunk) / (time.perf_counter() - started))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return checkpoint
@@ -0,0 +1,99 @@
+"""JWT signing key ring.
+
+Asymmetric keys listed in `JWT_SIGNING_KEYS` are parsed once and picked
+by the `kid` header of each token. The first key with a private key signs
+new tokens; every listed key verifies them. To rotate, publish the new
+public key first, then give it its private key and move it to the top,
+and drop the old key once the tokens it signed have expired.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_encode
+
+EC_CURVES = {"secp256r1": "P-256", "secp384r1": "P-384", "secp521r1": "P-521"}
+
+
+def _b64_int(value, length):
+    return base64url_encode(value.to_bytes(length, "big")).decode()
+
+
+def public_jwk(algorithm, public_key):
+    """Return the JWK of a parsed RSA or EC public key."""
+    numbers = public_key.public_numbers()
+    if algorithm.startswith(("RS", "PS")):
+        return {
+            "kty": "RSA",
+            "n": _b64_int(numbers.n, (numbers.n.bit_length() + 7) // 8),
+            "e": _b64_int(numbers.e, (numbers.e.bit_length() + 7) // 8),
+        }
+    length = (public_key.curve.key_size + 7) // 8
+    return {
+        "kty": "EC",
+        "crv": EC_CURVES[public_key.curve.name],
+        "x": _b64_int(numbers.x, length),
+        "y": _b64_int(numbers.y, length),
+    }
+
+
+class SigningKey:
+    def __init__(self, kid, algorithm, public_key, private_key=None):
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms or algorithm.startswith(("HS", "none")):
+            raise ImproperlyConfigured(
+                "Unsupported signing key algorithm: %s" % algorithm
+            )
+        prepare_key = algorithms[algorithm].prepare_key
+        self.kid = kid
+        self.algorithm = algorithm
+        self.public_key = prepare_key(public_key)
+        self.private_key = prepare_key(private_key) if private_key else None
+
+    @property
+    def jwk(self):
+        jwk = public_jwk(self.algorithm, self.public_key)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+class KeyRing:
+    def __init__(self, keys):
+        self.keys = {key.kid: key for key in keys}
+        self.signing_key = next(
+            (key for key in keys if key.private_key is not None), None
+        )
+        self.jwks = json.dumps(
+            {"keys": [key.jwk for key in keys]}, separators=(",", ":")
+        )
+        self.jwks_etag = '"%s"' % hashlib.sha256(self.jwks.encode()).hexdigest()
+
+    def __bool__(self):
+        return bool(self.keys)
+
+    def get(self, kid):
+        return self.keys.get(kid)
+
+    @property
+    def algorithms(self):
+        return sorted({key.algorithm for key in self.keys.values()})
+
+
+_key_ring = None
+
+
+def get_key_ring():
+    """Return the key ring built from `JWT_SIGNING_KEYS`, parsing it once."""
+    global _key_ring
+    if _key_ring is None:
+        _key_ring = KeyRing([SigningKey(**key) for key in settings.JWT_SIGNING_KEYS])
+    return _key_ring
+
+
+def reset_key_ring(setting=None, **kwargs):
+    """Parse `JWT_SIGNING_KEYS` again on next use. Connected to `setting_changed`."""
+    global _key_ring
+    if setting in (None, "JWT_SIGNING_KEYS"):
+        _key_ring = None
@@ -0,0 +1,72 @@
+"""Calibrate password hasher command."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from project.users.hashers import (
+    calibrate_argon2,
+    load_argon2_parameters,
+    record_argon2_parameters,
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark Argon2 and record the parameters every replica should hash with."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=int,
+            default=settings.ARGON2_TARGET_MS,
+            help="Time a single hash should take, in milliseconds.",
+        )
+        parser.add_argument(
+            "--max-memory-kib",
+            type=int,
+            default=settings.ARGON2_MAX_MEMORY_KIB,
+            help="Memory a single hash may use, in KiB.",
+        )
+        parser.add_argument(
+            "--parallelism",
+            type=int,
+            default=None,
+            help="Lanes per hash. Defaults to the CPUs per hashing worker.",
+        )
+        parser.add_argument(
+            "--if-missing",
+            action="store_true",
+            help="Keep the recorded parameters if there are any.",
+        )
+
+    def handle(self, *args, **options):
+        if options["if_missing"] and load_argon2_parameters() is not None:
+            self.stdout.write("Argon2 parameters already recorded.")
+            return
+
+        parameters = calibrate_argon2(
+            options["target_ms"], options["max_memory_kib"], options["parallelism"]
+        )
+        record_argon2_parameters(parameters)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Recorded Argon2 parameters in %s: time_cost=%d memory_cost=%d "
+                "parallelism=%d (%.1fms per hash)."
+                % (
+                    settings.ARGON2_PARAMETERS_FILE,
+                    parameters["time_cost"],
+                    parameters["memory_cost"],
+                    parameters["parallelism"],
+                    parameters["elapsed_ms"],
+                )
+            )
+        )
+        self.stdout.write(
+            "Hash with them on every replica, either sharing the file or "
+            "setting:\nARGON2_TIME_COST=%d\nARGON2_MEMORY_COST=%d\n"
+            "ARGON2_PARALLELISM=%d"
+            % (
+                parameters["time_cost"],
+                parameters["memory_cost"],
+                parameters["parallelism"],
+            )
+        )
@@ -0,0 +1,84 @@
+"""Import users command."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.users.importers import Checkpoint, UserImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users and profiles from a CSV or JSON lines file with email, "
+        "username, password, first_name, last_name, phone_number and "
+        "biography columns. Rows whose email or username is taken are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON lines file to import.")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="File format. Guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows inserted per transaction.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes. Defaults to the CPU count.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Progress file. Defaults to the imported file path plus .checkpoint.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the progress of a previous run.",
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = Checkpoint(
+            options["checkpoint"] or "%s.checkpoint" % options["path"]
+        )
+        if not options["restart"]:
+            checkpoint.load()
+        if checkpoint.rows:
+            self.stdout.write("Resuming after row %d." % checkpoint.rows)
+
+        def report(checkpoint, rows_per_second):
+            self.stdout.write(
+                "%d rows, %d created, %d skipped (%.0f rows/s)."
+                % (
+                    checkpoint.rows,
+                    checkpoint.created,
+                    checkpoint.skipped,
+                    rows_per_second,
+                )
+            )
+
+        started = time.perf_counter()
+        resumed_at = checkpoint.rows
+        importer = UserImporter(options["chunk_size"], options["workers"])
+        importer.run(
+            read_rows(options["path"], options["format"]), checkpoint, report
+        )
+        checkpoint.delete()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Imported %d users, skipped %d rows in %.1fs (%.0f rows/s)."
+                % (
+                    checkpoint.created,
+                    checkpoint.skipped,
+                    elapsed,
+                    (checkpoint.rows - resumed_at) / elapsed if elapsed else 0,
+                )
+            )
+        )
@@ -0,0 +1,30 @@
+"""Password hashing stats command."""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from project.users.hashers import get_hashing_slots
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the password hashes in progress, made and rejected by every "
+        "worker sharing PASSWORD_HASHING_SLOTS_BACKEND."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset the counters afterwards."
+        )
+
+    def handle(self, *args, **options):
+        slots = get_hashing_slots()
+        stats = slots.stats()
+        stats["average_ms"] = round(
+            stats["hash_seconds"] / stats["hashes"] * 1000 if stats["hashes"] else 0.0,
+            1,
+        )
+        self.stdout.write(json.dumps(stats, sort_keys=True))
+        if options["reset"]:
+            slots.reset()
@@ -0,0 +1,24 @@
+"""Purge expired denied tokens command."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from project.users.denylist import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete denied tokens that are past their expiry."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.DENYLIST_PURGE_BATCH_SIZE,
+            help="Rows deleted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS("Purged %d expired denied tokens." % deleted)
+        )
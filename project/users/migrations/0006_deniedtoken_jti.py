@@ -0,0 +1,39 @@
+import hashlib
+import uuid
+
+import jwt
+from django.db import migrations, models
+
+
+def token_jti(token):
+    payload = jwt.decode(token, None, False)
+    if payload.get("jti"):
+        return uuid.UUID(payload["jti"])
+    return uuid.UUID(bytes=hashlib.sha256(token.encode()).digest()[:16])
+
+
+def forwards(apps, schema_editor):
+    DeniedToken = apps.get_model("users", "DeniedToken")  # noqa: N806
+    for denied_token in DeniedToken.objects.only("token").iterator():
+        try:
+            jti = token_jti(denied_token.token)
+        except jwt.DecodeError:
+            denied_token.delete()
+            continue
+        DeniedToken.objects.filter(pk=denied_token.pk).update(jti=jti)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_auto_20210321_2130'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deniedtoken',
+            name='jti',
+            field=models.UUIDField(null=True),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_deniedtoken_jti'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='deniedtoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='deniedtoken',
+            name='jti',
+            field=models.UUIDField(db_index=True),
+        ),
+    ]
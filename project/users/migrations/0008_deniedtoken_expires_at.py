@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def forwards(apps, schema_editor):
+    # The token itself is gone, but it was denied after being issued, so
+    # its expiry is at most the expiration delta after the row was created.
+    DeniedToken = apps.get_model("users", "DeniedToken")  # noqa: N806
+    DeniedToken.objects.update(
+        expires_at=F("created") + settings.JWT_AUTH["JWT_EXPIRATION_DELTA"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_remove_deniedtoken_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deniedtoken',
+            name='expires_at',
+            field=models.DateTimeField(null=True, help_text='Date time after which the token is rejected anyway.', verbose_name='expires at'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_deniedtoken_expires_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deniedtoken',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, help_text='Date time after which the token is rejected anyway.', verbose_name='expires at'),
+        ),
+    ]
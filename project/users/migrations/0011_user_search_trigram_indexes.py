@@ -0,0 +1,37 @@
+from django.db import migrations
+
+SEARCH_COLUMNS = ('username', 'email', 'first_name', 'last_name')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in SEARCH_COLUMNS:
+        # Matches the UPPER(column::text) LIKE UPPER(...) of icontains.
+        schema_editor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS users_%s_trgm_idx ON users '
+            'USING gin (UPPER(%s::text) gin_trgm_ops)' % (column, column)
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS users_%s_trgm_idx' % column)
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY can't run in a transaction, but doesn't lock users
+    # against writes while the indexes are built.
+    atomic = False
+
+    dependencies = [
+        ('users', '0010_user_created_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
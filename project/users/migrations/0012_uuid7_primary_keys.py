@@ -0,0 +1,35 @@
+from django.db import migrations, models
+import project.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_user_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='users_created_id_idx',
+        ),
+        migrations.AlterField(
+            model_name='deniedtoken',
+            name='id',
+            field=models.UUIDField(default=project.models.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='id',
+            field=models.UUIDField(default=project.models.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=project.models.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created', '-id'], name='users_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_created_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='picture_variants',
+            field=models.TextField(blank=True, editable=False, help_text='JSON record of the resized copies of the picture, made by project.users.tasks.process_profile_picture.', verbose_name='profile picture variants'),
+        ),
+    ]
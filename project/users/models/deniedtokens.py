@@ -3,8 +3,17 @@ from project.models import BaseModel
 
 
 class DeniedToken(BaseModel):
-    token = models.CharField(max_length=500, db_index=True)
+    jti = models.UUIDField(db_index=True)
     user = models.ForeignKey("users.User", related_name='denied_tokens', on_delete=models.CASCADE)
+    expires_at = models.DateTimeField(
+        "expires at",
+        db_index=True,
+        help_text="Date time after which the token is rejected anyway.",
+    )
 
     class Meta:
         db_table = "denied_token"
+        indexes = [
+            # Deny list synchronization loads the rows created since the last one.
+            models.Index(fields=["created"], name="denied_token_created_idx")
+        ]
@@ -1,16 +1,62 @@
+import json
+
 from django.db import models
 from project.models import BaseModel
 
 
+def picture_variants(picture, variants):
+    """
+    Return the variants recorded in a `Profile.picture_variants` value if
+    they were made from `picture`, the picture name, or an empty list.
+    """
+    if not picture or not variants:
+        return []
+    variants = json.loads(variants)
+    if variants["source"] != picture:
+        return []
+    return variants["variants"]
+
+
+def picture_variants_source(variants):
+    """
+    Return the picture name a `Profile.picture_variants` value was made
+    from, or None. Pictures that couldn't be processed are recorded with
+    no variants.
+    """
+    return json.loads(variants)["source"] if variants else None
+
+
 class Profile(BaseModel):
     user = models.OneToOneField("users.User", on_delete=models.CASCADE)
     picture = models.ImageField(
         "profile picture", upload_to="users/pictures/", blank=True, null=True
     )
+    picture_variants = models.TextField(
+        "profile picture variants",
+        blank=True,
+        editable=False,
+        help_text=(
+            "JSON record of the resized copies of the picture, made by "
+            "project.users.tasks.process_profile_picture."
+        ),
+    )
     biography = models.TextField(max_length=500, blank=True)
 
     class Meta:
         db_table = "profiles"
+        indexes = [models.Index(fields=["-created"], name="profiles_created_idx")]
 
     def __str__(self):
         return str(self.user)
+
+    @property
+    def variants(self):
+        """The resized copies of the current picture, smallest first."""
+        return picture_variants(self.picture.name, self.picture_variants)
+
+    @property
+    def variants_pending(self):
+        """Whether the current picture wasn't processed yet."""
+        return bool(self.picture) and (
+            picture_variants_source(self.picture_variants) != self.picture.name
+        )
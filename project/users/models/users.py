@@ -53,11 +53,41 @@ class User(BaseModel, AbstractUser):
 
     class Meta:
         db_table = "users"
+        indexes = [
+            # Keyset pagination of the user list.
+            models.Index(fields=["-created", "-id"], name="users_created_id_idx")
+        ]
 
     def __str__(self):
         """Return username."""
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user.reset_credentials_state()
+        return user
+
+    def _credentials_state(self):
+        return (
+            self.__dict__.get("password"),
+            self.__dict__.get("issued_at"),
+            self.__dict__.get("is_active"),
+        )
+
+    def reset_credentials_state(self):
+        """Remember the password, issued_at and is_active values as saved."""
+        self._saved_credentials = self._credentials_state()
+
+    @property
+    def credentials_changed(self):
+        """
+        Whether the password, issued_at or is_active changed since last
+        loaded or saved.
+        """
+        saved = getattr(self, "_saved_credentials", None)
+        return saved is not None and saved != self._credentials_state()
+
     def get_short_name(self):
         """Return username."""
         return self.username
@@ -0,0 +1,108 @@
+"""Users pagination."""
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+POSITION_SEPARATOR = "|"
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the newest first `created` order, with the time
+    ordered id as tiebreaker, served by the `users_created_id_idx` index.
+    Pages cost the same at any depth, unlike limit and offset.
+
+    DRF's cursor holds the first ordering field only and pages through rows
+    sharing it with an offset. Here the cursor holds every ordering field,
+    so positions are unique and pages are always filtered by the keyset.
+    """
+
+    ordering = ("-created", "-id")
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(instance[field_name])
+            else:
+                values.append(getattr(instance, field_name))
+        return POSITION_SEPARATOR.join(str(value) for value in values)
+
+    def filter_position(self, queryset, position, after):
+        """
+        Filter `queryset` down to the rows after, or before, `position` in
+        the ordering: `(a < x) OR (a = x AND b < y) ...` for descending
+        fields.
+        """
+        values = position.split(POSITION_SEPARATOR)
+        if len(values) != len(self.ordering):
+            return queryset.none()
+        condition = Q()
+        equal = {}
+        for order, value in zip(self.ordering, values):
+            field_name = order.lstrip("-")
+            lookup = "gt" if order.startswith("-") != after else "lt"
+            condition |= Q(**equal, **{"%s__%s" % (field_name, lookup): value})
+            equal[field_name] = value
+        return queryset.filter(condition)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # DRF's implementation, filtering by the whole keyset.
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = self.filter_position(queryset, current_position, not reverse)
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[: self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
@@ -0,0 +1,163 @@
+"""Profile pictures.
+
+Uploaded pictures are stored as they are, then resized on a Celery worker
+to every size of `PROFILE_PICTURE_SIZES` that fits in the original, and
+encoded in every format of `PROFILE_PICTURE_FORMATS`. The variants are
+recorded on the profile along with the picture they were made from, so a
+newer upload never shows the variants of an older one. Pictures Pillow
+can't process are recorded with no variants and aren't tried again.
+"""
+import json
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from project.users.caches import user_representations
+from project.users.models import Profile
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+# Raised by Pillow for missing, corrupt, truncated or oversized images.
+PICTURE_ERRORS = (
+    OSError,
+    EOFError,
+    SyntaxError,
+    ValueError,
+    Image.DecompressionBombError,
+)
+
+
+def resize(image, size):
+    """
+    Return `image` scaled down to fit in a `size` pixels square. The sides
+    are rounded here rather than by `Image.thumbnail`, whose rounding
+    changed between Pillow versions.
+    """
+    scale = size / max(image.size)
+    if scale >= 1:
+        return image
+    width, height = image.size
+    return image.resize(
+        (max(1, round(width * scale)), max(1, round(height * scale))),
+        Image.LANCZOS,
+    )
+
+
+def encode_variants(picture):
+    """
+    Return the resized copies of the `picture` field file, encoded, as
+    (size, format, content, width, height) tuples, smallest first. Raises
+    one of `PICTURE_ERRORS` if Pillow can't process it.
+    """
+    with picture.open("rb"):
+        image = Image.open(picture)
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+    largest = max(image.size)
+    sizes = [size for size in sorted(settings.PROFILE_PICTURE_SIZES) if size < largest]
+    sizes.append(largest)
+
+    variants = []
+    for size in sizes:
+        resized = resize(image, size)
+        for image_format in settings.PROFILE_PICTURE_FORMATS:
+            content = BytesIO()
+            resized.save(
+                content, image_format, quality=settings.PROFILE_PICTURE_QUALITY
+            )
+            variants.append(
+                (size, image_format, content.getvalue(), resized.width, resized.height)
+            )
+    return variants
+
+
+def store_variants(picture, encoded):
+    """
+    Store the `encode_variants(picture)` copies of the `picture` field file
+    and return their descriptions.
+    """
+    stem = os.path.splitext(os.path.basename(picture.name))[0]
+    variants = []
+    try:
+        for size, image_format, content, width, height in encoded:
+            name = picture.storage.save(
+                "users/pictures/variants/%s_%d.%s"
+                % (stem, size, FORMAT_EXTENSIONS[image_format]),
+                ContentFile(content),
+            )
+            variants.append(
+                {
+                    "name": name,
+                    "format": image_format,
+                    "width": width,
+                    "height": height,
+                }
+            )
+    except Exception:
+        for variant in variants:
+            picture.storage.delete(variant["name"])
+        raise
+    return variants
+
+
+def process_picture(profile_id):
+    """
+    Make and record the variants of the current picture of profile
+    `profile_id`, deleting those of its previous picture. Returns the
+    number of variants made.
+    """
+    try:
+        profile = Profile.objects.get(pk=profile_id)
+    except Profile.DoesNotExist:
+        return 0
+    if not profile.variants_pending:
+        return 0
+
+    try:
+        encoded = encode_variants(profile.picture)
+    except PICTURE_ERRORS:
+        # Recorded with no variants, so later saves don't process it again.
+        logger.warning(
+            "Couldn't process picture %s of profile %s.",
+            profile.picture.name,
+            profile.pk,
+            exc_info=True,
+        )
+        encoded = []
+    variants = store_variants(profile.picture, encoded)
+    updated = Profile.objects.filter(
+        pk=profile.pk, picture=profile.picture.name, modified=profile.modified
+    ).update(
+        picture_variants=json.dumps(
+            {"source": profile.picture.name, "variants": variants}
+        ),
+        modified=timezone.now(),
+    )
+    storage = profile.picture.storage
+    if not updated:
+        # The profile changed meanwhile, its new state gets its own run.
+        obsolete = variants
+    else:
+        user_representations.invalidate(profile.user_id)
+        previous = json.loads(profile.picture_variants or "null")
+        obsolete = previous["variants"] if previous else []
+    for variant in obsolete:
+        storage.delete(variant["name"])
+    return len(variants) if updated else 0
+
+
+def schedule_picture_processing(profile):
+    """Process the picture of `profile` once the transaction commits, if needed."""
+    if profile.variants_pending:
+        from project.users.tasks import process_profile_picture
+
+        profile_id = str(profile.pk)
+        transaction.on_commit(lambda: process_profile_picture.delay(profile_id))
@@ -5,13 +5,78 @@ from rest_framework import serializers
 
 # Models
 from project.users.models import Profile
+from project.users.models.profiles import picture_variants
+
+
+def represent_variants(variants, storage, request=None):
+    """Return the representation of recorded picture variants."""
+    data = []
+    for variant in variants:
+        url = storage.url(variant["name"])
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        data.append(
+            {
+                "url": url,
+                "format": variant["format"],
+                "width": variant["width"],
+                "height": variant["height"],
+            }
+        )
+    return data
 
 
 class ProfileModelSerializer(serializers.ModelSerializer):
     """Profile model serializer."""
 
+    picture_variants = serializers.SerializerMethodField()
+
     class Meta:
         """Meta class."""
 
         model = Profile
-        fields = ("picture", "biography")
+        fields = ("picture", "picture_variants", "biography")
+
+    def get_picture_variants(self, profile):
+        """Resized copies of the picture, empty until they are made."""
+        return represent_variants(
+            profile.variants, profile.picture.storage, self.context.get("request")
+        )
+
+
+class ProfileReadSerializer(serializers.BaseSerializer):
+    """
+    Read only `ProfileModelSerializer`, skipping the field introspection.
+    Renders the same output.
+    """
+
+    picture_storage = Profile._meta.get_field("picture").storage
+
+    def to_representation(self, profile):
+        return self.represent(
+            profile.picture.name,
+            profile.picture_variants,
+            profile.biography,
+            self.context.get("request"),
+        )
+
+    @classmethod
+    def represent(cls, picture, variants, biography, request=None):
+        """
+        Return the representation of a picture name, its recorded variants
+        and a biography.
+        """
+        variants = represent_variants(
+            picture_variants(picture, variants), cls.picture_storage, request
+        )
+        if picture:
+            picture = cls.picture_storage.url(picture)
+            if request is not None:
+                picture = request.build_absolute_uri(picture)
+        else:
+            picture = None
+        return {
+            "picture": picture,
+            "picture_variants": variants,
+            "biography": str(biography),
+        }
@@ -1,15 +1,23 @@
+from collections.abc import Mapping
 from datetime import datetime
 
 import jwt
 from django.conf import settings
 from django.contrib.auth import password_validation, authenticate
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import RegexValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
-from rest_framework.validators import UniqueValidator
 from rest_framework_jwt.settings import api_settings
+from project.users.auth import get_resolved_user, jwt_decode_many
+from project.users.caches import user_representations
+from project.users.denylist import denylist
 from project.users.models import User, Profile
-from project.users.models.deniedtokens import DeniedToken
-from project.users.serializers.profiles import ProfileModelSerializer
+from project.users.serializers.profiles import (
+    ProfileModelSerializer,
+    ProfileReadSerializer,
+)
 
 jwt_payload_handler = api_settings.JWT_PAYLOAD_HANDLER
 jwt_encode_handler = api_settings.JWT_ENCODE_HANDLER
@@ -32,14 +40,81 @@ class UserModelSerializer(serializers.ModelSerializer):
         )
 
 
+class UserReadSerializer(serializers.BaseSerializer):
+    """
+    Read only `UserModelSerializer`, skipping the field introspection.
+    Renders the same output, from a user with its profile or from a
+    `values(*UserReadSerializer.values_fields)` row.
+    """
+
+    text_fields = ("username", "first_name", "last_name", "email", "phone_number")
+    values_fields = ("id",) + text_fields + (
+        "profile__id",
+        "profile__picture",
+        "profile__picture_variants",
+        "profile__biography",
+    )
+
+    def to_representation(self, user):
+        request = self.context.get("request")
+        if isinstance(user, Mapping):
+            data = {"id": str(user["id"])}
+            for field in self.text_fields:
+                data[field] = str(user[field])
+            data["profile"] = (
+                ProfileReadSerializer.represent(
+                    user["profile__picture"],
+                    user["profile__picture_variants"],
+                    user["profile__biography"],
+                    request,
+                )
+                if user["profile__id"] is not None
+                else None
+            )
+            return data
+
+        data = {"id": str(user.id)}
+        for field in self.text_fields:
+            data[field] = str(getattr(user, field))
+        try:
+            profile = user.profile
+        except ObjectDoesNotExist:
+            data["profile"] = None
+        else:
+            data["profile"] = ProfileReadSerializer.represent(
+                profile.picture.name,
+                profile.picture_variants,
+                profile.biography,
+                request,
+            )
+        return data
+
+
+def user_representation(user):
+    """
+    Return the serialized `user`, cached. Built by `UserReadSerializer` when
+    `FAST_USER_SERIALIZER` is set, `UserModelSerializer` otherwise.
+    """
+    if settings.FAST_USER_SERIALIZER:
+        serializer_class = UserReadSerializer
+    else:
+        serializer_class = UserModelSerializer
+    return user_representations.get(user, lambda u: serializer_class(u).data)
+
+
 class UserSignUpSerializer(serializers.Serializer):
+    """User sign up serializer.
+
+    Uniqueness of the email and username is left to the database
+    constraints, so a sign up costs the user and profile inserts only.
+    """
+
+    unique_fields = ("email", "username")
+    unique_error = "This field must be unique."
+
     id = serializers.IntegerField(read_only=True)
-    email = serializers.EmailField(
-        validators=[UniqueValidator(queryset=User.objects.all())]
-    )
-    username = serializers.CharField(
-        validators=[UniqueValidator(queryset=User.objects.all())]
-    )
+    email = serializers.EmailField()
+    username = serializers.CharField()
 
     phone_regex = RegexValidator(
         regex=r"\+?1?\d{9,15}$",
@@ -69,12 +144,44 @@ class UserSignUpSerializer(serializers.Serializer):
     def create(self, data):
         """Handle user and profile creation."""
         data.pop("password_confirmation")
-        user = User.objects.create_user(
-            **data, is_verified=False, is_client=True
-        )
-        Profile.objects.create(user=user)
+        password = data.pop("password")
+        user = User(**data, is_verified=False, is_client=True)
+        user.email = User.objects.normalize_email(user.email)
+        user.username = User.normalize_username(user.username)
+        user.set_password(password)
+        try:
+            with transaction.atomic():
+                # The primary key has a default, force the insert so Django
+                # doesn't try an update first.
+                user.save(force_insert=True)
+                Profile.objects.create(user=user)
+        except IntegrityError:
+            error = self.unique_violation(user)
+            if error is None:
+                raise
+            raise error
         return user
 
+    def unique_violation(self, user):
+        """
+        Return the validation error of the unique fields already taken, or
+        None if none is.
+        """
+        lookup = Q()
+        for field in self.unique_fields:
+            lookup |= Q(**{field: getattr(user, field)})
+        taken = {
+            field
+            for row in User.objects.filter(lookup).values(*self.unique_fields)
+            for field in self.unique_fields
+            if row[field] == getattr(user, field)
+        }
+        if not taken:
+            return None
+        return serializers.ValidationError(
+            {field: [self.unique_error] for field in sorted(taken)}
+        )
+
 
 class UserLoginSerializer(serializers.Serializer):
     """User login serializer.
@@ -108,16 +215,20 @@ class UserLoginSerializer(serializers.Serializer):
         return jwt_encode_handler(payload)
 
 
+def token_error_message(error):
+    if isinstance(error, jwt.ExpiredSignatureError):
+        return "Verification link has expired."
+    return "Invalid token"
+
+
 class TokenSerialiser(serializers.Serializer):
     token = serializers.CharField()
 
     def validate_token(self, data):
         try:
             payload = jwt_decode_handler(data)
-        except jwt.ExpiredSignatureError:
-            raise serializers.ValidationError("Verification link has expired.")
-        except jwt.PyJWTError:
-            raise serializers.ValidationError("Invalid token")
+        except jwt.PyJWTError as e:
+            raise serializers.ValidationError(token_error_message(e))
         self.validate_refresh(payload)
         self.context["payload"] = payload
         self.context["token"] = data
@@ -133,11 +244,36 @@ class TokenSerialiser(serializers.Serializer):
 
     def save(self):
         payload = self.context["payload"]
-        user = User.objects.get(email=payload["email"])
+        user = get_resolved_user(payload["id"]) or User.objects.get(
+            email=payload["email"]
+        )
         return jwt_encode_handler(jwt_payload_handler(user, payload.get('orig_iat')))
 
     def deny(self):
         payload = self.context["payload"]
         token = self.context["token"]
-        denied_token, _ = DeniedToken.objects.get_or_create(user_id=payload["id"], token=token)
-        return denied_token.token
+        denylist.deny(token, payload)
+        return token
+
+
+class TokenBatchSerialiser(serializers.Serializer):
+    """Verify many tokens at once, for service to service introspection."""
+
+    tokens = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        max_length=settings.TOKEN_VERIFY_BATCH_SIZE,
+    )
+
+    def verify(self):
+        """Return the verdict and, if valid, the claims of every token."""
+        tokens = self.validated_data["tokens"]
+        results = []
+        for token, payload in zip(tokens, jwt_decode_many(tokens)):
+            if isinstance(payload, jwt.PyJWTError):
+                results.append(
+                    {"token": token, "valid": False, "error": token_error_message(payload)}
+                )
+            else:
+                results.append({"token": token, "valid": True, "payload": payload})
+        return results
@@ -0,0 +1,49 @@
+"""Users signals."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from project.users.caches import (
+    bump_user_version,
+    issued_at_watermark,
+    update_issued_at_watermark,
+    user_representations,
+    verified_tokens,
+)
+from project.users.models import Profile, User
+from project.users.pictures import schedule_picture_processing
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_caches(sender, instance, created, **kwargs):
+    """Drop what was cached from a user once it changes."""
+    if instance.credentials_changed:
+        bump_user_version(instance.pk)
+        verified_tokens.discard_user(instance.pk)
+    if created or instance.credentials_changed:
+        update_issued_at_watermark(
+            instance.pk, issued_at_watermark(instance.issued_at, instance.is_active)
+        )
+    instance.reset_credentials_state()
+    if not created:
+        user_representations.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_caches(sender, instance, **kwargs):
+    """Reject the tokens of a deleted user in every worker."""
+    update_issued_at_watermark(instance.pk)
+    verified_tokens.discard_user(instance.pk)
+    user_representations.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_profile_caches(sender, instance, **kwargs):
+    """Drop the cached representation of the profile's user."""
+    user_representations.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def process_profile_picture(sender, instance, **kwargs):
+    """Make the resized copies of a newly uploaded picture."""
+    schedule_picture_processing(instance)
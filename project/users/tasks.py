@@ -0,0 +1,19 @@
+"""Users tasks."""
+
+from celery import shared_task
+from django.conf import settings
+
+from project.users.denylist import purge_expired
+from project.users.pictures import process_picture
+
+
+@shared_task
+def purge_denied_tokens():
+    """Delete denied tokens that are past their expiry."""
+    return purge_expired(settings.DENYLIST_PURGE_BATCH_SIZE)
+
+
+@shared_task
+def process_profile_picture(profile_id):
+    """Make the resized copies of a profile picture."""
+    return process_picture(profile_id)
@@ -0,0 +1,170 @@
+"""Rate limiting.
+
+Requests to the unauthenticated user actions are counted per client IP and
+per submitted email with a sliding window: the count of the previous fixed
+window, weighted by how much of it still overlaps the sliding one, plus the
+count of the current window. The limits are set per action and key in
+`RATE_LIMITS`, and the counters live in `RATE_LIMIT_BACKEND`: Redis, shared
+by every worker, or the memory of the current process.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY = "rate_limit:{}:{}:{}"
+
+# Increment the current window unless the sliding count reached the limit.
+# KEYS: current window, previous window.
+# ARGV: previous window weight, limit, window in milliseconds.
+SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('PEXPIRE', KEYS[1], 2 * tonumber(ARGV[3]))
+return 1
+"""
+
+
+class SlidingWindow:
+    """Base class of the rate limit backends."""
+
+    def allow(self, key, limit, window, now=None):
+        """
+        Count a request under `key` and return True, or return False if
+        `limit` requests were already counted in the last `window` seconds.
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+
+class LocalSlidingWindow(SlidingWindow):
+    """Counters kept in the memory of the current process."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, current_window):
+        for key in [
+            k for k, v in self._counters.items() if v[0] < current_window - 1
+        ]:
+            del self._counters[key]
+
+    def allow(self, key, limit, window, now=None):
+        now = time.time() if now is None else now
+        index = int(now // window)
+        weight = 1 - (now % window) / window
+        with self._lock:
+            start, current, previous = self._counters.get(key, (index, 0, 0))
+            if start != index:
+                previous = current if start == index - 1 else 0
+                current = 0
+            if previous * weight + current >= limit:
+                self._counters[key] = (index, current, previous)
+                return False
+            self._counters[key] = (index, current + 1, previous)
+            if len(self._counters) > self.max_keys:
+                self._prune(index)
+            return True
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class RedisSlidingWindow(SlidingWindow):
+    """
+    Counters kept in the Redis server of the default cache, updated
+    atomically by a Lua script. Requests are let through if Redis is down.
+    """
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+
+        self._redis = get_redis_connection("default")
+        self._script = self._redis.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def allow(self, key, limit, window, now=None):
+        now = time.time() if now is None else now
+        index = int(now // window)
+        weight = 1 - (now % window) / window
+        keys = ["%s:%d" % (key, index), "%s:%d" % (key, index - 1)]
+        try:
+            return bool(self._script(keys=keys, args=[weight, limit, window * 1000]))
+        except Exception:
+            logger.exception("Rate limit backend unavailable, allowing request.")
+            return True
+
+    def reset(self):
+        for key in self._redis.scan_iter(RATE_LIMIT_KEY.format("*", "*", "*")):
+            self._redis.delete(key)
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = import_string(settings.RATE_LIMIT_BACKEND)()
+        return _rate_limiter
+
+
+def reset_rate_limiter(setting=None, **kwargs):
+    """Build the backend again on next use. Connected to `setting_changed`."""
+    global _rate_limiter
+    if setting in (None, "RATE_LIMIT_BACKEND"):
+        _rate_limiter = None
+
+
+class ActionRateThrottle(BaseThrottle):
+    """
+    Throttle the view actions listed in `RATE_LIMITS`, by client IP and by
+    the email in the request body. Runs before the action, so rejected
+    requests never reach the serializers or the password hasher.
+    """
+
+    parse_rate = SimpleRateThrottle.parse_rate
+
+    def get_idents(self, request):
+        yield "ip", self.get_ident(request)
+        try:
+            email = request.data.get("email")
+        except AttributeError:
+            email = None
+        if isinstance(email, str) and email:
+            yield "email", email.strip().lower()
+
+    def allow_request(self, request, view):
+        limits = settings.RATE_LIMITS.get(getattr(view, "action", None))
+        if not limits:
+            return True
+
+        limiter = get_rate_limiter()
+        self.wait_seconds = None
+        for scope, ident in self.get_idents(request):
+            if scope not in limits:
+                continue
+            limit, window = self.parse_rate(limits[scope])
+            key = RATE_LIMIT_KEY.format(view.action, scope, ident)
+            if not limiter.allow(key, limit, window):
+                self.wait_seconds = window - time.time() % window
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from project.users.keyring import get_key_ring
+
+
+def jwks_etag(request):
+    return get_key_ring().jwks_etag
+
+
+@require_GET
+@condition(etag_func=jwks_etag)
+def jwks(request):
+    """Publish the public signing keys, so tokens can be verified locally."""
+    response = HttpResponse(get_key_ring().jwks, content_type="application/json")
+    patch_cache_control(response, public=True, max_age=settings.JWKS_MAX_AGE)
+    return response
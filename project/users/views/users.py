@@ -1,26 +1,57 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from project.users.serializers.profiles import ProfileModelSerializer
 from project.users.serializers.users import (
+    TokenBatchSerialiser,
     TokenSerialiser,
     UserLoginSerializer,
     UserModelSerializer,
+    UserReadSerializer,
     UserSignUpSerializer,
+    user_representation,
 )
 from project.users.models import User
+from project.users.pagination import UserCursorPagination
+from project.users.authentication import JSONWebTokenAuthentication
+from project.users.caches import user_representations
+from project.users.filters import UserSearchFilter
+from project.users.etags import (
+    conditional_update,
+    if_match_versions,
+    last_modified,
+    profile_condition,
+    set_user_validators,
+    user_condition,
+    user_etag,
+    user_versions,
+)
 from project.users.permissions import ActionBasedPermission
-from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+from project.users.pictures import schedule_picture_processing
+from project.users.throttling import ActionRateThrottle
 
 
 class UserViewSet(
-    mixins.RetrieveModelMixin, mixins.UpdateModelMixin, viewsets.GenericViewSet
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.GenericViewSet,
 ):
 
-    queryset = User.objects.filter(is_active=True, is_client=True)
+    queryset = User.objects.filter(
+        is_active=True, is_client=True
+    ).select_related("profile")
     serializer_class = UserModelSerializer
     authentication_classes = (JSONWebTokenAuthentication,)
     permission_classes = (ActionBasedPermission,)
+    throttle_classes = (ActionRateThrottle,)
+    pagination_class = UserCursorPagination
+    filter_backends = (DjangoFilterBackend, UserSearchFilter)
+    filterset_fields = ("is_active", "is_client")
     action_permissions = {
         permissions.IsAuthenticated: [
             "update",
@@ -34,11 +65,36 @@ class UserViewSet(
             "login",
             "signup",
             "token_verify",
+            "token_verify_batch",
             "token_refresh",
             "token_deny",
         ],
     }
 
+    def get_queryset(self):
+        """Staff list every user, filtering on is_active and is_client."""
+        if self.action == "list" and self.request.user.is_staff:
+            return User.objects.select_related("profile")
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == "list" and settings.FAST_USER_SERIALIZER:
+            return UserReadSerializer
+        return super().get_serializer_class()
+
+    def get_object(self):
+        """Reuse the authenticated user when it is the one being requested."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        user = self.request.user
+        if (
+            str(user.pk) == str(self.kwargs[lookup_url_kwarg])
+            and user.is_active
+            and user.is_client
+        ):
+            self.check_object_permissions(self.request, user)
+            return user
+        return super().get_object()
+
     @action(detail=False, methods=["post"])
     def login(self, request):
         token_login = UserLoginSerializer(data=request.data)
@@ -71,6 +127,13 @@ class UserViewSet(
 
         return Response({"token": token})
 
+    @action(detail=False, methods=["post"], url_path="token/verify/batch")
+    def token_verify_batch(self, request):
+        token_batch = TokenBatchSerialiser(data=request.data)
+        token_batch.is_valid(raise_exception=True)
+
+        return Response({"results": token_batch.verify()})
+
     @action(detail=False, methods=["post"], url_path="token/deny")
     def token_deny(self, request):
         token_deny = TokenSerialiser(data=request.data)
@@ -89,17 +152,70 @@ class UserViewSet(
             profile, data=request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-
-        data = UserModelSerializer(user).data
-        return Response(data)
+        versions = if_match_versions(request)
+        if versions is None:
+            serializer.save()
+        else:
+            conditional_update(
+                profile,
+                serializer.validated_data,
+                profile_condition(*versions),
+            )
+            user_representations.invalidate(user.pk)
+            schedule_picture_processing(profile)
+
+        return set_user_validators(
+            Response(user_representation(user)), user_versions(user)
+        )
 
     def update(self, request, *args, **kwargs):
-        response = super(UserViewSet, self).update(request, *args, **kwargs)
-        data = UserModelSerializer(response.data).data
-        return Response(data)
+        partial = kwargs.pop("partial", False)
+        user = self.get_object()
+        serializer = self.get_serializer(user, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        versions = if_match_versions(request)
+        if versions is None:
+            self.perform_update(serializer)
+        else:
+            conditional_update(
+                user,
+                serializer.validated_data,
+                user_condition(*versions),
+            )
+            user_representations.invalidate(user.pk)
+
+        return set_user_validators(
+            Response(user_representation(user)), user_versions(user)
+        )
+
+    def get_versions(self, pk):
+        """
+        Return the modified timestamps of user `pk` and its profile, or None
+        if there is no such user.
+        """
+        try:
+            rows = list(
+                self.filter_queryset(self.get_queryset())
+                .filter(pk=pk)
+                .values_list("modified", "profile__modified")[:1]
+            )
+        except (TypeError, ValueError, ValidationError):
+            return None
+        return rows[0] if rows else None
 
     def retrieve(self, request, pk) -> Response:
+        if "HTTP_IF_NONE_MATCH" in request.META or "HTTP_IF_MODIFIED_SINCE" in request.META:
+            versions = self.get_versions(pk)
+            if versions is not None:
+                response = get_conditional_response(
+                    request,
+                    etag=user_etag(*versions),
+                    last_modified=last_modified(*versions),
+                )
+                if response is not None:
+                    return set_user_validators(response, versions)
+
         user = self.get_object()
-        serialiser = UserModelSerializer(user)
-        return Response(serialiser.data)
+        return set_user_validators(
+            Response(user_representation(user)), user_versions(user)
+        )
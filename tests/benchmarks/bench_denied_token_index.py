@@ -0,0 +1,74 @@
+"""Compare the old and new denied_token key layouts.
+
+Builds two scratch tables of ROWS rows each, one keyed by the encoded JWT
+in a varchar(500) column (the old layout) and one by a uuid jti, then
+reports their index sizes and point lookup latency. Needs PostgreSQL:
+
+    DATABASE_URL=psql://... python tests/benchmarks/bench_denied_token_index.py [ROWS]
+"""
+import os
+import random
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+LOOKUPS = min(10000, ROWS)
+
+LAYOUTS = {
+    "token varchar(500)": (
+        "CREATE TEMPORARY TABLE bench_denied_token (key varchar(500))",
+        # Roughly the length of the tokens this project issues.
+        "SELECT repeat(md5(i::text), 9) FROM generate_series(1, %s) AS i",
+        "SELECT repeat(md5(%s::text), 9)",
+    ),
+    "jti uuid": (
+        "CREATE TEMPORARY TABLE bench_denied_token (key uuid)",
+        "SELECT md5(i::text)::uuid FROM generate_series(1, %s) AS i",
+        "SELECT md5(%s::text)::uuid",
+    ),
+}
+
+
+def bench(cursor, create, fill, key):
+    cursor.execute(create)
+    cursor.execute("INSERT INTO bench_denied_token " + fill, [ROWS])
+    cursor.execute("CREATE INDEX bench_denied_token_key ON bench_denied_token (key)")
+    cursor.execute("ANALYZE bench_denied_token")
+    cursor.execute("SELECT pg_relation_size('bench_denied_token_key')")
+    index_size = cursor.fetchone()[0]
+
+    keys = []
+    for i in random.sample(range(1, ROWS + 1), LOOKUPS):
+        cursor.execute(key, [i])
+        keys.append(cursor.fetchone()[0])
+    start = time.perf_counter()
+    for value in keys:
+        cursor.execute("SELECT 1 FROM bench_denied_token WHERE key = %s", [value])
+        cursor.fetchone()
+    latency = (time.perf_counter() - start) / LOOKUPS
+
+    cursor.execute("DROP TABLE bench_denied_token")
+    return index_size, latency
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+    django.setup()
+    from django.db import connection
+
+    print("%d rows, %d lookups" % (ROWS, LOOKUPS))
+    with connection.cursor() as cursor:
+        for name, (create, fill, key) in LAYOUTS.items():
+            index_size, latency = bench(cursor, create, fill, key)
+            print(
+                "%-20s index %8.1f MiB  lookup %7.1f us"
+                % (name, index_size / 2 ** 20, latency * 10 ** 6)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare DRF's JSON renderer and parser with the project ones.
+
+Renders and parses a single user representation and a page of 1,000:
+
+    python tests/benchmarks/bench_json.py [NUMBER]
+"""
+import io
+import os
+import sys
+import timeit
+import uuid
+
+import django
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+NUMBER = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+PAGE_SIZE = 1000
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+    django.setup()
+    from django.utils import timezone
+    from rest_framework import parsers, renderers
+    from project import renderers as project_renderers
+    from project.parsers import JSONParser
+    from project.renderers import JSONRenderer
+
+    def user(i):
+        return {
+            "id": uuid.uuid4(),
+            "username": "user%d" % i,
+            "first_name": "First",
+            "last_name": "Last",
+            "email": "user%d@example.com" % i,
+            "phone_number": "+34600000000",
+            "created": timezone.now(),
+            "profile": {
+                "picture": "/media/users/pictures/%d.png" % i,
+                "picture_variants": [],
+                "biography": "",
+            },
+        }
+
+    single = user(0)
+    page = {"count": PAGE_SIZE, "results": [user(i) for i in range(PAGE_SIZE)]}
+    print("orjson: %s" % ("yes" if project_renderers.orjson else "no"))
+
+    for name, data, objects in (("single", single, 1), ("page", page, PAGE_SIZE)):
+        number = max(1, NUMBER // objects)
+        content = renderers.JSONRenderer().render(data)
+        assert JSONRenderer().render(data) == content
+        cases = (
+            ("drf render", lambda: renderers.JSONRenderer().render(data)),
+            ("render", lambda: JSONRenderer().render(data)),
+            ("drf parse", lambda: parsers.JSONParser().parse(io.BytesIO(content))),
+            ("parse", lambda: JSONParser().parse(io.BytesIO(content))),
+        )
+        for case, func in cases:
+            best = min(timeit.repeat(func, number=number, repeat=5))
+            print(
+                "%-6s %-11s %7.2f us/object"
+                % (name, case, best / number / objects * 10 ** 6)
+            )
+
+
+if __name__ == "__main__":
+    main()
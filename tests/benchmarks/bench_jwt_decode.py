@@ -0,0 +1,55 @@
+"""Compare the two-pass and single-pass JWT decoding paths.
+
+Only the token decoding is measured, not the user and deny list checks:
+
+    python tests/benchmarks/bench_jwt_decode.py [NUMBER]
+"""
+import os
+import sys
+import timeit
+import uuid
+
+import django
+import jwt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+NUMBER = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from rest_framework_jwt.settings import api_settings
+    from project.users.auth import decode_token, jwt_get_secret_key
+
+    def two_pass_decode(token):
+        unverified_payload = jwt.decode(token, None, False)
+        secret_key = jwt_get_secret_key(unverified_payload)
+        return jwt.decode(
+            token,
+            api_settings.JWT_PUBLIC_KEY or secret_key,
+            api_settings.JWT_VERIFY,
+            options={"verify_exp": api_settings.JWT_VERIFY_EXPIRATION},
+            leeway=api_settings.JWT_LEEWAY,
+            audience=api_settings.JWT_AUDIENCE,
+            issuer=api_settings.JWT_ISSUER,
+            algorithms=[api_settings.JWT_ALGORITHM],
+        )
+
+    user = get_user_model()(
+        id=uuid.uuid4(), username="bench", email="bench@example.com"
+    )
+    token = api_settings.JWT_ENCODE_HANDLER(
+        api_settings.JWT_PAYLOAD_HANDLER(user)
+    )
+    assert two_pass_decode(token) == decode_token(token)
+
+    for name, decode in (("two-pass", two_pass_decode), ("single-pass", decode_token)):
+        best = min(timeit.repeat(lambda: decode(token), number=NUMBER, repeat=5))
+        print("%-12s %6.2f us/token" % (name, best / NUMBER * 10 ** 6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measure the overhead the rate limiter adds to a login request.
+
+Uses the local memory backend, and Redis too when REDIS_URL is set:
+
+    [REDIS_URL=redis://localhost:6379/0] python tests/benchmarks/bench_throttling.py [NUMBER]
+"""
+import os
+import sys
+import timeit
+
+import django
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+NUMBER = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+    django.setup()
+    from django.test import override_settings
+    from rest_framework.parsers import JSONParser
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from project.users.throttling import ActionRateThrottle, get_rate_limiter
+
+    class View:
+        action = "login"
+
+    django_request = APIRequestFactory().post(
+        "/users/login/",
+        {"email": "bench@example.com", "password": "password"},
+        format="json",
+    )
+    request = Request(django_request, parsers=[JSONParser()])
+    request.data
+    throttle = ActionRateThrottle()
+    view = View()
+
+    backends = [("local", {})]
+    if os.environ.get("REDIS_URL"):
+        backends.append(
+            (
+                "redis",
+                {
+                    "RATE_LIMIT_BACKEND": "project.users.throttling.RedisSlidingWindow",
+                    "CACHES": {
+                        "default": {
+                            "BACKEND": "django_redis.cache.RedisCache",
+                            "LOCATION": os.environ["REDIS_URL"],
+                        }
+                    },
+                },
+            )
+        )
+
+    limits = {"login": {"ip": "1000000000/day", "email": "1000000000/day"}}
+    for name, overrides in backends:
+        with override_settings(RATE_LIMITS=limits, **overrides):
+            get_rate_limiter().reset()
+            best = min(
+                timeit.repeat(
+                    lambda: throttle.allow_request(request, view),
+                    number=NUMBER,
+                    repeat=5,
+                )
+            )
+            get_rate_limiter().reset()
+        print("%-6s %7.2f us/request" % (name, best / NUMBER * 10 ** 6))
+
+
+if __name__ == "__main__":
+    main()
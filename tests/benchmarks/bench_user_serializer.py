@@ -0,0 +1,80 @@
+"""Compare UserModelSerializer with UserReadSerializer.
+
+Measures the per-object cost of serializing a single user and pages of
+1,000 users, from instances and from `values()` rows:
+
+    python tests/benchmarks/bench_user_serializer.py [NUMBER]
+"""
+import os
+import sys
+import timeit
+import uuid
+
+import django
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+NUMBER = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+PAGE_SIZE = 1000
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+    from project.users.models import Profile, User
+    from project.users.serializers.users import UserModelSerializer, UserReadSerializer
+
+    users, rows = [], []
+    for i in range(PAGE_SIZE):
+        user = User(
+            id=uuid.uuid4(),
+            username="user%d" % i,
+            email="user%d@example.com" % i,
+            first_name="First",
+            last_name="Last",
+            phone_number="+34600000000",
+        )
+        profile = Profile(
+            user=user, picture="users/pictures/%d.png" % i, biography="Hello"
+        )
+        users.append(user)
+        rows.append(
+            {
+                "id": user.id,
+                "username": user.username,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "email": user.email,
+                "phone_number": user.phone_number,
+                "profile__id": profile.id,
+                "profile__picture": profile.picture.name,
+                "profile__picture_variants": profile.picture_variants,
+                "profile__biography": profile.biography,
+            }
+        )
+
+    render = JSONRenderer().render
+    assert render(UserReadSerializer(users, many=True).data) == render(
+        UserModelSerializer(users, many=True).data
+    )
+    assert render(UserReadSerializer(rows, many=True).data) == render(
+        UserModelSerializer(users, many=True).data
+    )
+
+    cases = (
+        ("model, single", lambda: UserModelSerializer(users[0]).data, 1),
+        ("read, single", lambda: UserReadSerializer(users[0]).data, 1),
+        ("read row, single", lambda: UserReadSerializer(rows[0]).data, 1),
+        ("model, page", lambda: UserModelSerializer(users, many=True).data, PAGE_SIZE),
+        ("read, page", lambda: UserReadSerializer(users, many=True).data, PAGE_SIZE),
+        ("read row, page", lambda: UserReadSerializer(rows, many=True).data, PAGE_SIZE),
+    )
+    for name, serialize, objects in cases:
+        number = max(1, NUMBER // objects)
+        best = min(timeit.repeat(serialize, number=number, repeat=5))
+        print("%-18s %7.2f us/object" % (name, best / number / objects * 10 ** 6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compare insert throughput with uuid4 and uuid7 primary keys.
+
+Inserts ROWS rows in batches into a scratch table keyed by a uuid primary
+key, once per generator, and reports the rows per second and, on
+PostgreSQL, the size of the primary key index. The gap grows with the
+table, once the index no longer fits in memory:
+
+    DATABASE_URL=psql://... python tests/benchmarks/bench_uuid_insert.py [ROWS]
+"""
+import os
+import sys
+import time
+import uuid
+
+import django
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+BATCH_SIZE = 1000
+
+
+def bench(connection, cursor, generate):
+    cursor.execute(
+        "CREATE TEMPORARY TABLE bench_uuid (id uuid PRIMARY KEY, created varchar(32))"
+    )
+    start = time.perf_counter()
+    for _ in range(ROWS // BATCH_SIZE):
+        cursor.executemany(
+            "INSERT INTO bench_uuid (id, created) VALUES (%s, %s)",
+            [(str(generate()), "2019-01-01 00:00:00") for _ in range(BATCH_SIZE)],
+        )
+    elapsed = time.perf_counter() - start
+
+    index_size = None
+    if connection.vendor == "postgresql":
+        cursor.execute("SELECT pg_relation_size('bench_uuid_pkey')")
+        index_size = cursor.fetchone()[0]
+    cursor.execute("DROP TABLE bench_uuid")
+    return ROWS / elapsed, index_size
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+    django.setup()
+    from django.db import connection, transaction
+    from project.models import uuid7
+
+    print("%d rows, %s" % (ROWS, connection.vendor))
+    for name, generate in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+        with transaction.atomic(), connection.cursor() as cursor:
+            rate, index_size = bench(connection, cursor, generate)
+        print(
+            "%-6s %9.0f rows/s%s"
+            % (
+                name,
+                rate,
+                "  index %7.1f MiB" % (index_size / 2 ** 20) if index_size else "",
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import json
 from django.test import Client
 from django.urls import reverse
 from rest_framework import status
+from project.users.throttling import get_rate_limiter
 from constants import (
     PASSWORD,
     EMAIL,
@@ -17,6 +18,11 @@ from constants import (
 )
 
 
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    get_rate_limiter().reset()
+
+
 @pytest.fixture
 @pytest.mark.django_db
 def create_user():
@@ -0,0 +1,374 @@
+import io
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_jwt.settings import api_settings
+from project.users.auth import decode_token, jwt_decode_many
+from project.users.caches import verified_tokens
+from project.users.denylist import BloomFilter, denylist
+from project.users.hashers import (
+    CalibratedArgon2PasswordHasher,
+    HashingPool,
+    LocalHashingSlots,
+    PasswordHashingBusy,
+    load_argon2_parameters,
+    record_argon2_parameters,
+)
+from project.users.models.deniedtokens import DeniedToken
+from project.users.models.users import User
+from project.users.throttling import LocalSlidingWindow
+
+jwt_payload_handler = api_settings.JWT_PAYLOAD_HANDLER
+jwt_encode_handler = api_settings.JWT_ENCODE_HANDLER
+jwt_decode_handler = api_settings.JWT_DECODE_HANDLER
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [str(uuid.uuid4()) for _ in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(1000))
+    assert false_positives < 50
+
+
+@pytest.mark.django_db
+def test_denylist__valid_token(create_user, django_assert_num_queries):
+    payload = jwt_payload_handler(User.objects.get())
+    token = jwt_encode_handler(payload)
+    denylist.is_denied(token, payload)
+
+    with django_assert_num_queries(0):
+        assert denylist.is_denied(token, payload) is False
+
+
+@pytest.mark.django_db
+def test_denylist__deny(create_user, django_assert_num_queries):
+    payload = jwt_payload_handler(User.objects.get())
+    token = jwt_encode_handler(payload)
+    denylist.deny(token, payload)
+
+    with django_assert_num_queries(0):
+        assert denylist.is_denied(token, payload) is True
+
+
+@pytest.mark.django_db
+def test_purge_denied_tokens(create_user):
+    user = User.objects.get()
+    now = timezone.now()
+    for days in (-3, -2, -1, 1):
+        DeniedToken.objects.create(
+            user=user, jti=uuid.uuid4(), expires_at=now + timedelta(days=days)
+        )
+
+    call_command("purge_denied_tokens", batch_size=2)
+
+    assert list(DeniedToken.objects.values_list("expires_at", flat=True)) == [
+        now + timedelta(days=1)
+    ]
+
+
+@pytest.mark.django_db
+def test_decode_token(create_user):
+    payload = jwt_payload_handler(User.objects.get())
+    token = jwt_encode_handler(payload)
+
+    assert decode_token(token) == jwt.decode(
+        token, settings.JWT_AUTH["JWT_SECRET_KEY"], algorithms=["HS256"]
+    )
+
+
+@pytest.mark.django_db
+def test_decode_token__invalid(create_user):
+    payload = jwt_payload_handler(User.objects.get())
+    token = jwt_encode_handler(payload)
+    header, claims, signature = token.split(".")
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        decode_token(".".join((header, claims, signature[::-1])))
+    with pytest.raises(jwt.DecodeError):
+        decode_token(".".join((header, "e30", signature)[:2]))
+
+    payload["exp"] = datetime.utcnow() - timedelta(seconds=1)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_token(jwt_encode_handler(payload))
+
+
+def user_secret(user):
+    return "secret-%s" % user.password
+
+
+@pytest.mark.django_db
+def test_user_secret_key(create_user, monkeypatch, django_assert_num_queries):
+    monkeypatch.setattr(api_settings, "JWT_GET_USER_SECRET_KEY", user_secret)
+    user = User.objects.get()
+    token = jwt_encode_handler(jwt_payload_handler(user))
+
+    with django_assert_num_queries(0):
+        decode_token(token)
+
+    user.set_password("-OtherPassword123-")
+    user.save()
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        decode_token(token)
+    decode_token(jwt_encode_handler(jwt_payload_handler(user)))
+
+
+@pytest.mark.django_db
+def test_user_secret_key__unknown_user(monkeypatch):
+    monkeypatch.setattr(api_settings, "JWT_GET_USER_SECRET_KEY", user_secret)
+    user_id = str(uuid.uuid4())
+    payload = {"id": user_id, "orig_iat": 0}
+    token = jwt.encode(payload, "forged", "HS256").decode()
+
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_token(token)
+    # Keys of forged ids expire like the secrets they version.
+    for key in ("user_version:%s" % user_id, "user_secret:%s:" % user_id):
+        keys = [k for k in cache._expire_info if key in k]
+        assert keys and all(cache._expire_info[k] is not None for k in keys)
+
+
+def pem_key_pair(private_key):
+    return {
+        "private_key": private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode(),
+        "public_key": private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode(),
+    }
+
+
+@pytest.fixture
+def signing_keys(settings):
+    rsa_key = pem_key_pair(
+        rsa.generate_private_key(65537, 2048, default_backend())
+    )
+    ec_key = pem_key_pair(
+        ec.generate_private_key(ec.SECP256R1(), default_backend())
+    )
+    settings.JWT_SIGNING_KEYS = [
+        dict(kid="2021-06", algorithm="ES256", **ec_key),
+        {"kid": "2021-01", "algorithm": "RS256", "public_key": rsa_key["public_key"]},
+    ]
+    return rsa_key, ec_key
+
+
+@pytest.mark.django_db
+def test_key_ring(create_user, signing_keys):
+    rsa_key, _ = signing_keys
+    payload = jwt_payload_handler(User.objects.get())
+    token = jwt_encode_handler(payload)
+    rotated_token = jwt.encode(
+        payload, rsa_key["private_key"], "RS256", headers={"kid": "2021-01"}
+    )
+
+    assert jwt.get_unverified_header(token)["kid"] == "2021-06"
+    assert decode_token(token) == decode_token(rotated_token)
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_token(
+            jwt.encode(
+                payload, rsa_key["private_key"], "RS256", headers={"kid": "2020-01"}
+            )
+        )
+
+
+@pytest.mark.django_db
+def test_jwks(signing_keys):
+    c = Client()
+
+    response = c.get(reverse("jwks"))
+    keys = response.json()["keys"]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "max-age" in response["Cache-Control"]
+    assert [key["kid"] for key in keys] == ["2021-06", "2021-01"]
+    assert keys[0]["kty"] == "EC" and keys[1]["kty"] == "RSA"
+
+    response = c.get(reverse("jwks"), HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_verified_tokens(create_user, django_assert_num_queries):
+    user = User.objects.get()
+    payload = jwt_payload_handler(user)
+    token = jwt_encode_handler(payload)
+    jwt_decode_handler(token)
+    stats = verified_tokens.stats()
+
+    with django_assert_num_queries(0):
+        assert jwt_decode_handler(token) == decode_token(token)
+    assert verified_tokens.stats()["hits"] == stats["hits"] + 1
+
+    user.issued_at = timezone.now()
+    user.save()
+    assert verified_tokens.get(token) is None
+
+    token = jwt_encode_handler(jwt_payload_handler(user))
+    denylist.deny(token, jwt_decode_handler(token))
+    assert verified_tokens.get(token) is None
+
+
+@pytest.mark.django_db
+def test_verified_tokens__changed_in_other_worker(create_user, monkeypatch):
+    monkeypatch.setattr(api_settings, "JWT_GET_USER_SECRET_KEY", user_secret)
+    user = User.objects.get()
+    payload = jwt_payload_handler(user)
+    token = jwt_encode_handler(payload)
+    jwt_decode_handler(token)
+    assert verified_tokens.get(token) is not None
+
+    # Another worker changed the password, without reaching this one's cache.
+    User.objects.filter(pk=user.pk).update(password="other")
+    cache.set("user_version:%s" % user.pk, "other")
+    with pytest.raises(jwt.InvalidSignatureError):
+        jwt_decode_handler(token)
+
+    monkeypatch.setattr(api_settings, "JWT_GET_USER_SECRET_KEY", None)
+    token = jwt_encode_handler(payload)
+    jwt_decode_handler(token)
+    # Another worker revoked the tokens issued so far.
+    cache.set("user_issued_at:%s" % user.pk, payload["orig_iat"] + 1)
+    with pytest.raises(jwt.InvalidTokenError):
+        jwt_decode_handler(token)
+    assert isinstance(jwt_decode_many([token])[0], jwt.InvalidTokenError)
+
+
+@pytest.mark.django_db
+def test_issued_at_watermark(create_user, django_assert_num_queries):
+    user = User.objects.get()
+    jwt_decode_handler(jwt_encode_handler(jwt_payload_handler(user)))
+
+    with django_assert_num_queries(0):
+        jwt_decode_handler(jwt_encode_handler(jwt_payload_handler(user)))
+
+    cache.delete("user_issued_at:%s" % user.pk)
+    with django_assert_num_queries(1):
+        jwt_decode_handler(jwt_encode_handler(jwt_payload_handler(user)))
+    with django_assert_num_queries(0):
+        jwt_decode_handler(jwt_encode_handler(jwt_payload_handler(user)))
+
+    user.issued_at = timezone.now() + timedelta(days=1)
+    user.save()
+    with pytest.raises(jwt.InvalidTokenError):
+        jwt_decode_handler(jwt_encode_handler(jwt_payload_handler(user)))
+
+
+def test_hashing_pool():
+    pool = HashingPool(workers=1, queue_size=1)
+    release = threading.Event()
+    busy = [
+        threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)
+    ]
+    for thread in busy:
+        thread.start()
+    while pool.depth < 2:
+        time.sleep(0.01)
+
+    with pytest.raises(PasswordHashingBusy):
+        pool.run(len, "password")
+
+    release.set()
+    for thread in busy:
+        thread.join()
+    assert pool.run(len, "password") == 8
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["peak_depth"] == 2
+
+
+def test_hashing_pool__shared_slots():
+    # Two worker processes sharing one slot.
+    slots = LocalHashingSlots()
+    pools = [HashingPool(1, 1, slots, limit=1, lease=10) for _ in range(2)]
+    release = threading.Event()
+    busy = threading.Thread(target=pools[0].run, args=(release.wait,))
+    busy.start()
+    while slots.stats()["in_progress"] < 1:
+        time.sleep(0.01)
+
+    with pytest.raises(PasswordHashingBusy):
+        pools[1].run(len, "password")
+
+    release.set()
+    busy.join()
+    assert pools[1].run(len, "password") == 8
+    stats = slots.stats()
+    assert (stats["hashes"], stats["rejected"], stats["in_progress"]) == (2, 1, 0)
+
+
+def test_calibrate_password_hasher(settings, tmp_path):
+    settings.ARGON2_PARAMETERS_FILE = str(tmp_path / "argon2.json")
+    hasher = CalibratedArgon2PasswordHasher()
+    encoded = hasher.encode("password", hasher.salt())
+    assert not hasher.must_update(encoded)
+
+    call_command(
+        "calibrate_password_hasher",
+        target_ms=5,
+        max_memory_kib=1024,
+        parallelism=1,
+        stdout=io.StringIO(),
+    )
+    parameters = load_argon2_parameters()
+    assert parameters["memory_cost"] <= 1024
+    assert parameters["parallelism"] == 1
+    assert hasher.time_cost == parameters["time_cost"]
+    assert hasher.memory_cost == parameters["memory_cost"]
+
+    assert hasher.verify("password", encoded)
+    assert hasher.must_update(encoded)
+    assert not hasher.must_update(hasher.encode("password", hasher.salt()))
+
+
+def test_calibrated_argon2_parameters(settings, tmp_path):
+    settings.ARGON2_PARAMETERS_FILE = str(tmp_path / "argon2.json")
+    hasher = CalibratedArgon2PasswordHasher()
+    assert hasher.time_cost == Argon2PasswordHasher.time_cost
+    assert not (tmp_path / "argon2.json").exists()
+
+    record_argon2_parameters(
+        {"time_cost": 3, "memory_cost": 1024, "parallelism": 2}
+    )
+    settings.ARGON2_TIME_COST = 4
+    settings.ARGON2_PARALLELISM = 1
+    assert (hasher.time_cost, hasher.memory_cost, hasher.parallelism) == (
+        4,
+        1024,
+        1,
+    )
+
+
+def test_local_sliding_window():
+    limiter = LocalSlidingWindow()
+    assert limiter.allow("key", 2, 60, now=0)
+    assert limiter.allow("key", 2, 60, now=30)
+    assert not limiter.allow("key", 2, 60, now=59)
+    assert limiter.allow("other", 2, 60, now=59)
+
+    # Half of the previous window still overlaps: 2 * 0.5 + 0 < 2.
+    assert limiter.allow("key", 2, 60, now=90)
+    assert not limiter.allow("key", 2, 60, now=90)
+    assert limiter.allow("key", 2, 60, now=180)
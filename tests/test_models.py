@@ -0,0 +1,12 @@
+import uuid
+
+from project.models import uuid7
+
+
+def test_uuid7():
+    ids = [uuid7() for _ in range(10000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(value.version == 7 for value in ids)
+    assert all(value.variant == uuid.RFC_4122 for value in ids)
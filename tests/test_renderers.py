@@ -0,0 +1,48 @@
+import io
+import uuid
+from datetime import datetime
+
+import pytest
+from django.utils import timezone
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from project.parsers import JSONParser
+from project.renderers import JSONRenderer
+from project.users.models import Profile
+
+DATA = {
+    "id": uuid.uuid4(),
+    "created": timezone.now(),
+    "naive": datetime(2019, 1, 2, 3, 4, 5),
+    "text": "ünïcode \u2028\u2029 </script>",
+    "numbers": [1, 2.5, None, True],
+    "nested": {"list": ({"a": 1},), 1: "key"},
+}
+
+
+def test_json_renderer():
+    assert JSONRenderer().render(DATA) == renderers.JSONRenderer().render(DATA)
+    assert JSONRenderer().render(
+        DATA, "application/json; indent=4"
+    ) == renderers.JSONRenderer().render(DATA, "application/json; indent=4")
+    assert JSONRenderer().render(None) == b""
+
+
+def test_json_renderer__file_fields():
+    profile = Profile(picture="users/pictures/picture.png")
+    assert JSONRenderer().render({"picture": profile.picture}) == (
+        b'{"picture":"/media/users/pictures/picture.png"}'
+    )
+    assert JSONRenderer().render({"picture": Profile().picture}) == (
+        b'{"picture":null}'
+    )
+
+
+def test_json_parser():
+    content = renderers.JSONRenderer().render({"text": DATA["text"], "n": [1, 2.5]})
+    assert JSONParser().parse(io.BytesIO(content)) == {
+        "text": DATA["text"],
+        "n": [1, 2.5],
+    }
+    with pytest.raises(ParseError):
+        JSONParser().parse(io.BytesIO(b'{"text": NaN}'))
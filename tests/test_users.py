@@ -4,14 +4,91 @@ import pytest
 import json
 import jwt
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework_jwt.settings import api_settings
+from project.users import etags, hashers
+from project.users.views import users as users_views
+from project.users.hashers import HashingPool, LocalHashingSlots
+from project.users.caches import verified_tokens
+from project.users.models import Profile
 from project.users.models.users import User
-from constants import PASSWORD, EMAIL, USERNAME, FIRST_NAME, LAST_NAME
+from project.users.importers import hash_password
+from project.users.pictures import process_picture
+from project.users.serializers.users import UserModelSerializer, UserReadSerializer
+from constants import PASSWORD, EMAIL, EMAIL_SECONDARY, USERNAME, FIRST_NAME, LAST_NAME
+import io
+import threading
 import time
 
 
+def statements(context):
+    """Captured queries other than the transaction savepoints."""
+    return [
+        query["sql"] for query in context.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+
+
+def signup(data):
+    return Client().post(
+        reverse("users-signup"),
+        content_type="application/json",
+        data=json.dumps(
+            dict({"password": PASSWORD, "password_confirmation": PASSWORD}, **data)
+        ),
+    )
+
+
+@pytest.mark.django_db
+def test_user_signup():
+    with CaptureQueriesContext(connection) as context:
+        response = signup({"email": EMAIL, "username": USERNAME})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["email"] == EMAIL
+    assert [sql.split()[0] for sql in statements(context)] == ["INSERT", "INSERT"]
+    assert User.objects.get(email=EMAIL).profile
+
+
+@pytest.mark.django_db
+def test_user_signup__unique(create_user):
+    with CaptureQueriesContext(connection) as context:
+        response = signup({"email": EMAIL, "username": USERNAME})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {
+        "email": ["This field must be unique."],
+        "username": ["This field must be unique."],
+    }
+    assert [sql.split()[0] for sql in statements(context)] == ["INSERT", "SELECT"]
+
+    response = signup({"email": EMAIL_SECONDARY, "username": USERNAME})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"username": ["This field must be unique."]}
+
+    response = signup({"email": EMAIL_SECONDARY, "username": "secondary"})
+    assert response.status_code == status.HTTP_201_CREATED
+    assert User.objects.count() == 2
+
+    # Usernames are compared once NFKC normalized.
+    response = signup({"email": "third@example.com", "username": "\uff53econdary"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"username": ["This field must be unique."]}
+
+
 @pytest.mark.django_db
 def test_user_login(create_user):
     c = Client()
@@ -64,6 +141,49 @@ def test_user_retrieve(create_user, login_user):
     assert response.json()["email"] == EMAIL
 
 
+@pytest.mark.django_db
+def test_user_retrieve__single_user_query(create_user, login_user):
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+
+    with CaptureQueriesContext(connection) as context:
+        response = c.get(
+            reverse("users-detail", kwargs={"pk": create_user["id"]}),
+            content_type="application/json",
+        )
+
+    user_queries = [
+        query for query in context.captured_queries
+        if 'FROM "users"' in query["sql"]
+    ]
+    assert response.status_code == status.HTTP_200_OK
+    assert len(user_queries) == 1
+
+
+@pytest.mark.django_db
+def test_user_hot_queries__unordered(create_user, login_user):
+    cache.clear()
+    verified_tokens._local.clear()
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+    url = reverse("users-detail", kwargs={"pk": create_user["id"]})
+
+    with CaptureQueriesContext(connection) as context:
+        etag = c.get(url)["ETag"]
+        c.get(url, HTTP_IF_NONE_MATCH=etag)
+        c.post(
+            reverse("users-login"),
+            content_type="application/json",
+            data=json.dumps({"email": EMAIL, "password": PASSWORD}),
+        )
+        c.post(
+            reverse("users-token-deny"),
+            content_type="application/json",
+            data=json.dumps({"token": login_user}),
+        )
+
+    assert statements(context)
+    assert not [sql for sql in statements(context) if "ORDER BY" in sql]
+
+
 @pytest.mark.django_db
 def test_user_retrieve__unauthorised(create_user):
     user_id = create_user["id"]
@@ -102,6 +222,248 @@ def test_user_update__unauthorised(create_user):
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+@pytest.mark.django_db
+def test_user_retrieve__cached_representation(create_user, login_user, monkeypatch):
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+    url = reverse("users-detail", kwargs={"pk": create_user["id"]})
+    built = []
+    to_representation = UserModelSerializer.to_representation
+    monkeypatch.setattr(
+        UserModelSerializer,
+        "to_representation",
+        lambda self, instance: built.append(1) or to_representation(self, instance),
+    )
+
+    first = c.get(url).json()
+    assert c.get(url).json() == first
+    assert len(built) == 1
+
+    response = c.patch(
+        reverse("users-profile", kwargs={"pk": create_user["id"]}),
+        content_type="application/json",
+        data=json.dumps({"biography": "Changed"}),
+    )
+    assert response.json()["profile"]["biography"] == "Changed"
+    assert c.get(url).json()["profile"]["biography"] == "Changed"
+    assert len(built) == 2
+
+
+@pytest.mark.django_db
+def test_user_retrieve__not_modified(create_user, login_user, monkeypatch):
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+    url = reverse("users-detail", kwargs={"pk": create_user["id"]})
+
+    response = c.get(url)
+    etag = response["ETag"]
+    assert response.status_code == status.HTTP_200_OK
+    assert "Last-Modified" in response
+
+    monkeypatch.setattr(UserModelSerializer, "to_representation", None)
+    with CaptureQueriesContext(connection) as context:
+        response = c.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+    assert len(statements(context)) == 1
+
+    response = c.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    monkeypatch.undo()
+
+    c.patch(
+        reverse("users-profile", kwargs={"pk": create_user["id"]}),
+        content_type="application/json",
+        data=json.dumps({"biography": "Changed"}),
+    )
+    response = c.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+    assert response.json()["profile"]["biography"] == "Changed"
+
+
+@pytest.mark.django_db
+def test_user_update__if_match(create_user, login_user):
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+    url = reverse("users-detail", kwargs={"pk": create_user["id"]})
+    etag = c.get(url)["ETag"]
+
+    with CaptureQueriesContext(connection) as context:
+        response = c.patch(
+            url,
+            content_type="application/json",
+            data=json.dumps({"first_name": FIRST_NAME}),
+            HTTP_IF_MATCH=etag,
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["first_name"] == FIRST_NAME
+    assert response["ETag"] != etag
+    assert len([sql for sql in statements(context) if sql.startswith("UPDATE")]) == 1
+    assert c.get(url).json()["first_name"] == FIRST_NAME
+
+    response = c.patch(
+        url,
+        content_type="application/json",
+        data=json.dumps({"first_name": "Stale"}),
+        HTTP_IF_MATCH=etag,
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert User.objects.get(pk=create_user["id"]).first_name == FIRST_NAME
+
+    response = c.patch(
+        url,
+        content_type="application/json",
+        data=json.dumps({"first_name": "Stale"}),
+        HTTP_IF_MATCH='W/"1.1"',
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Needs concurrent writers."
+)
+@pytest.mark.django_db(transaction=True)
+def test_user_update__if_match__race(create_user, login_user, monkeypatch):
+    url = reverse("users-detail", kwargs={"pk": create_user["id"]})
+    etag = Client(HTTP_AUTHORIZATION="JWT " + login_user).get(url)["ETag"]
+
+    # Both requests check the precondition before either one writes.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def conditional_update(*args, **kwargs):
+        barrier.wait()
+        return etags.conditional_update(*args, **kwargs)
+
+    monkeypatch.setattr(users_views, "conditional_update", conditional_update)
+    statuses = []
+
+    def update(first_name):
+        try:
+            response = Client(HTTP_AUTHORIZATION="JWT " + login_user).patch(
+                url,
+                content_type="application/json",
+                data=json.dumps({"first_name": first_name}),
+                HTTP_IF_MATCH=etag,
+            )
+            statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=update, args=(name,)) for name in ("One", "Two")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [
+        status.HTTP_200_OK,
+        status.HTTP_412_PRECONDITION_FAILED,
+    ]
+
+
+@pytest.mark.django_db
+def test_profile_user_update__if_match(create_user, login_user, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+    url = reverse("users-profile", kwargs={"pk": create_user["id"]})
+    etag = c.get(reverse("users-detail", kwargs={"pk": create_user["id"]}))["ETag"]
+
+    def picture():
+        image = io.BytesIO()
+        Image.new("RGB", (1, 1)).save(image, "PNG")
+        return SimpleUploadedFile("picture.png", image.getvalue(), "image/png")
+
+    response = c.patch(
+        url,
+        data=encode_multipart(BOUNDARY, {"picture": picture()}),
+        content_type=MULTIPART_CONTENT,
+        HTTP_IF_MATCH=etag,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["profile"]["picture"].startswith("/media/users/pictures/")
+    assert len(list((tmp_path / "users" / "pictures").iterdir())) == 1
+
+    response = c.patch(
+        url,
+        data=encode_multipart(BOUNDARY, {"picture": picture()}),
+        content_type=MULTIPART_CONTENT,
+        HTTP_IF_MATCH=etag,
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert len(list((tmp_path / "users" / "pictures").iterdir())) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_profile_user_update__picture_variants(
+    create_user, login_user, settings, tmp_path
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.PROFILE_PICTURE_SIZES = (64, 128, 1024)
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+    url = reverse("users-detail", kwargs={"pk": create_user["id"]})
+
+    image = io.BytesIO()
+    Image.new("RGB", (300, 200)).save(image, "PNG")
+    picture = SimpleUploadedFile("picture.png", image.getvalue(), "image/png")
+    response = c.patch(
+        reverse("users-profile", kwargs={"pk": create_user["id"]}),
+        data=encode_multipart(BOUNDARY, {"picture": picture}),
+        content_type=MULTIPART_CONTENT,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["profile"]["picture_variants"] == []
+
+    # The Celery task ran eagerly once the request committed.
+    variants = c.get(url).json()["profile"]["picture_variants"]
+    assert [
+        (variant["format"], variant["width"], variant["height"])
+        for variant in variants
+    ] == [
+        ("webp", 64, 43),
+        ("jpeg", 64, 43),
+        ("webp", 128, 85),
+        ("jpeg", 128, 85),
+        ("webp", 300, 200),
+        ("jpeg", 300, 200),
+    ]
+    assert all(
+        variant["url"].startswith("/media/users/pictures/variants/")
+        for variant in variants
+    )
+    assert len(list((tmp_path / "users" / "pictures" / "variants").iterdir())) == 6
+
+    image = io.BytesIO()
+    Image.new("RGB", (100, 100)).save(image, "PNG")
+    picture = SimpleUploadedFile("picture.png", image.getvalue(), "image/png")
+    c.patch(
+        reverse("users-profile", kwargs={"pk": create_user["id"]}),
+        data=encode_multipart(BOUNDARY, {"picture": picture}),
+        content_type=MULTIPART_CONTENT,
+    )
+    variants = c.get(url).json()["profile"]["picture_variants"]
+    assert [variant["width"] for variant in variants] == [64, 64, 100, 100]
+    assert len(list((tmp_path / "users" / "pictures" / "variants").iterdir())) == 4
+
+
+@pytest.mark.django_db
+def test_process_picture__invalid_image(create_user, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+    profile = Profile.objects.get(user_id=create_user["id"])
+    profile.picture.save("picture.png", ContentFile(b"not an image"), save=False)
+    Profile.objects.filter(pk=profile.pk).update(picture=profile.picture.name)
+
+    assert process_picture(profile.pk) == 0
+    profile.refresh_from_db()
+    assert not profile.variants_pending
+    assert profile.variants == []
+
+    scheduled = []
+    monkeypatch.setattr(transaction, "on_commit", scheduled.append)
+    profile.biography = "Hello World!"
+    profile.save()
+    assert scheduled == []
+
+
 @pytest.mark.django_db
 def test_profile_user_update(create_user, login_user):
     token = "JWT " + login_user
@@ -248,6 +610,25 @@ def test_user_token__issued_at_revoke__invalid(create_user, login_user):
     assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
+@pytest.mark.django_db
+def test_user_token__inactive_user__invalid(
+    create_user, login_user, create_secondary_user
+):
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+    url = reverse("users-detail", kwargs={"pk": create_secondary_user["id"]})
+    assert c.get(reverse("users-list")).status_code == status.HTTP_200_OK
+
+    user = User.objects.get(pk=create_user["id"])
+    user.is_active = False
+    user.save()
+
+    assert c.get(reverse("users-list")).status_code == status.HTTP_401_UNAUTHORIZED
+    assert c.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    user.delete()
+    assert c.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+
 @pytest.mark.django_db
 def test_user_token__deny(create_user, login_user):
     c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
@@ -285,3 +666,293 @@ def test_user_retrieve__denied_token__unauthorized(create_user, login_user, deny
         content_type="application/json",
     )
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_user_token__verify_batch(
+    create_user, login_user, create_secondary_user, login_secondary_user, deny_token
+):
+    invalid_token = (
+        "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJzdWIiOiIxMjM0NTY3ODkwIiwibmF"
+        "tZSI6IkpvaG4gRG9lIiwiaWF0IjoxNTE2MjM5MDIyfQ.SflKxwRJSMeKKF2QT4fwpMeJ"
+        "f36POk6yJV_adQssw5c"
+    )
+    tokens = [login_secondary_user, deny_token, invalid_token]
+    cache.clear()
+
+    c = Client()
+    with CaptureQueriesContext(connection) as context:
+        response = c.post(
+            reverse("users-token-verify-batch"),
+            content_type="application/json",
+            data=json.dumps({"tokens": tokens}),
+        )
+
+    user_queries = [
+        query for query in context.captured_queries
+        if 'FROM "users"' in query["sql"]
+    ]
+    results = response.json()["results"]
+    assert response.status_code == status.HTTP_200_OK
+    assert len(user_queries) == 1
+    assert [result["valid"] for result in results] == [True, False, False]
+    assert results[0]["payload"]["email"] == create_secondary_user["email"]
+
+
+@pytest.mark.django_db
+def test_user_login__hashing_busy(create_user, settings, monkeypatch):
+    settings.PASSWORD_HASHERS = ["project.users.hashers.BoundedArgon2PasswordHasher"]
+    slots = LocalHashingSlots()
+    saturated_pool = HashingPool(1, 1, slots, limit=1, lease=10)
+    slots.acquire(1, 10)
+    monkeypatch.setattr(hashers, "get_hashing_pool", lambda: saturated_pool)
+
+    c = Client()
+    response = c.post(
+        reverse("users-login"),
+        content_type="application/json",
+        data=json.dumps({"email": "unknown@marcosaguayo.com", "password": PASSWORD}),
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.django_db
+def test_user_login__rate_limited(create_user, settings):
+    settings.RATE_LIMITS = {"login": {"ip": "10/min", "email": "2/min"}}
+    c = Client()
+
+    for _ in range(2):
+        response = c.post(
+            reverse("users-login"),
+            content_type="application/json",
+            data=json.dumps({"email": EMAIL, "password": "wrong"}),
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = c.post(
+        reverse("users-login"),
+        content_type="application/json",
+        data=json.dumps({"email": EMAIL.upper(), "password": PASSWORD}),
+    )
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert "Retry-After" in response
+
+    response = c.post(
+        reverse("users-login"),
+        content_type="application/json",
+        data=json.dumps({"email": EMAIL_SECONDARY, "password": PASSWORD}),
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_import_users(create_user, tmp_path):
+    rows = [
+        {"email": "one@example.com", "username": "one", "password": PASSWORD},
+        {"email": "two@example.com", "username": "two", "biography": "Hi"},
+        {"email": "ONE@example.com", "username": "one"},
+        {"email": EMAIL, "username": "taken"},
+        {"email": "invalid", "username": "invalid"},
+        {"email": "three@EXAMPLE.com", "username": "three", "password": PASSWORD},
+        # NFKC normalized to the taken "one".
+        {"email": "four@example.com", "username": "\uff4fne"},
+    ]
+    path = tmp_path / "users.jsonl"
+    path.write_text("\n".join(json.dumps(row) for row in rows))
+
+    # Resume after the first chunk of a previous run.
+    checkpoint = tmp_path / "users.jsonl.checkpoint"
+    checkpoint.write_text(json.dumps({"rows": 2, "created": 2, "skipped": 0}))
+    User.objects.create(email="one@example.com", username="one")
+
+    out = io.StringIO()
+    call_command("import_users", str(path), chunk_size=2, workers=2, stdout=out)
+
+    assert "Resuming after row 2." in out.getvalue()
+    assert "rows/s" in out.getvalue()
+    assert not checkpoint.exists()
+    assert not User.objects.filter(username="two").exists()
+    user = User.objects.select_related("profile").get(email="three@example.com")
+    assert user.check_password(PASSWORD)
+    assert not user.is_verified
+    assert user.profile.biography == ""
+    assert User.objects.count() == 3
+
+
+def test_import_users__hash_password(settings, monkeypatch):
+    settings.PASSWORD_HASHERS = [
+        "project.users.hashers.CalibratedArgon2PasswordHasher"
+    ]
+
+    def saturated_pool():
+        raise hashers.PasswordHashingBusy()
+
+    monkeypatch.setattr(hashers, "get_hashing_pool", saturated_pool)
+    encoded = hash_password(PASSWORD)
+    assert encoded.startswith("argon2$")
+    assert not hashers.CalibratedArgon2PasswordHasher().must_update(encoded)
+
+
+@pytest.mark.django_db
+def test_user_read_serializer(create_user, create_secondary_user):
+    User.objects.filter(pk=create_secondary_user["id"]).update(
+        first_name=FIRST_NAME, phone_number="+34600000000"
+    )
+    user = User.objects.get(pk=create_user["id"])
+    user.profile.picture = "users/pictures/picture.png"
+    user.profile.picture_variants = json.dumps(
+        {
+            "source": "users/pictures/picture.png",
+            "variants": [
+                {
+                    "name": "users/pictures/variants/picture_64.webp",
+                    "format": "webp",
+                    "width": 64,
+                    "height": 48,
+                }
+            ],
+        }
+    )
+    user.profile.biography = "Hello World!"
+    user.profile.save()
+    User.objects.create(email="staff@example.com", username="staff")
+    users = User.objects.select_related("profile").order_by("email")
+    rows = users.values(*UserReadSerializer.values_fields)
+    request = APIRequestFactory().get("/")
+
+    for context in ({}, {"request": request}):
+        expected = JSONRenderer().render(
+            UserModelSerializer(users, many=True, context=context).data
+        )
+        for data in (users, rows):
+            assert JSONRenderer().render(
+                UserReadSerializer(data, many=True, context=context).data
+            ) == expected
+        assert JSONRenderer().render(
+            UserReadSerializer(user, context=context).data
+        ) == JSONRenderer().render(UserModelSerializer(user, context=context).data)
+
+
+@pytest.mark.django_db
+def test_user_retrieve__fast_serializer(create_user, login_user, settings):
+    settings.FAST_USER_SERIALIZER = True
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+
+    response = c.get(reverse("users-detail", kwargs={"pk": create_user["id"]}))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == create_user
+
+
+@pytest.mark.django_db
+def test_user_list(create_user, create_secondary_user, login_user):
+    staff = User.objects.create(
+        email="staff@example.com", username="staff", is_client=False, is_staff=True
+    )
+    User.objects.create(
+        email="inactive@example.com", username="inactive", is_active=False
+    )
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+
+    ids = []
+    url = reverse("users-list") + "?page_size=1"
+    while url:
+        with CaptureQueriesContext(connection) as context:
+            response = c.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        users_queries = [sql for sql in statements(context) if 'FROM "users"' in sql]
+        assert not any("COUNT(" in sql or "OFFSET" in sql for sql in users_queries)
+        ids += [user["id"] for user in response.json()["results"]]
+        url = response.json()["next"]
+    assert ids == [create_secondary_user["id"], create_user["id"]]
+
+    response = c.get(reverse("users-list"), {"is_client": "false"})
+    assert response.json()["results"] == []
+
+    token = api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(staff))
+    c = Client(HTTP_AUTHORIZATION="JWT " + token)
+    response = c.get(reverse("users-list"), {"is_client": "false"})
+    assert [user["id"] for user in response.json()["results"]] == [str(staff.pk)]
+    assert response.json()["results"][0]["profile"] is None
+    response = c.get(reverse("users-list"), {"is_active": "false"})
+    assert [user["username"] for user in response.json()["results"]] == ["inactive"]
+
+
+@pytest.mark.django_db
+def test_user_list__same_created(create_user, login_user):
+    for i in range(4):
+        User.objects.create(email="user%d@example.com" % i, username="user%d" % i)
+    User.objects.update(created=timezone.now())
+    expected = [
+        str(pk)
+        for pk in User.objects.order_by("-created", "-id").values_list("pk", flat=True)
+    ]
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+
+    pages = []
+    url = reverse("users-list") + "?page_size=2"
+    while url:
+        with CaptureQueriesContext(connection) as context:
+            response = c.get(url)
+        assert not any("OFFSET" in sql for sql in statements(context))
+        pages.append([user["id"] for user in response.json()["results"]])
+        previous, url = response.json()["previous"], response.json()["next"]
+    assert sum(pages, []) == expected
+
+    # And back from the last page.
+    pages.pop()
+    while previous:
+        response = c.get(previous)
+        assert [user["id"] for user in response.json()["results"]] == pages.pop()
+        previous = response.json()["previous"]
+    assert pages == []
+
+
+@pytest.mark.django_db
+def test_user_list__unauthorised(create_user):
+    response = Client().get(reverse("users-list"))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_user_list__search(create_user, create_secondary_user, login_user):
+    User.objects.filter(pk=create_secondary_user["id"]).update(
+        first_name="Ada", last_name="Lovelace"
+    )
+    c = Client(HTTP_AUTHORIZATION="JWT " + login_user)
+
+    response = c.get(reverse("users-list"), {"search": "love ada"})
+    assert [user["id"] for user in response.json()["results"]] == [
+        create_secondary_user["id"]
+    ]
+    response = c.get(reverse("users-list"), {"search": "marcosaguayo"})
+    assert len(response.json()["results"]) == 2
+    response = c.get(reverse("users-list"), {"search": "lovelace hello"})
+    assert response.json()["results"] == []
+    # Words too short for the trigram indexes are ignored.
+    response = c.get(reverse("users-list"), {"search": "love ad"})
+    assert [user["id"] for user in response.json()["results"]] == [
+        create_secondary_user["id"]
+    ]
+    response = c.get(reverse("users-list"), {"search": "a"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_admin_search(create_user, create_secondary_user):
+    from django.contrib.admin.sites import site
+
+    user_admin = site._registry[User]
+    users, use_distinct = user_admin.get_search_results(
+        None, User.objects.all(), "HELLO@"
+    )
+    assert [str(user.pk) for user in users] == [create_user["id"]]
+    assert not use_distinct
+
+    profile_admin = site._registry[Profile]
+    profiles, _ = profile_admin.get_search_results(None, Profile.objects.all(), "second")
+    assert [str(profile.user_id) for profile in profiles] == [create_secondary_user["id"]]
+
+    users, _ = user_admin.get_search_results(None, User.objects.all(), "a b")
+    assert not users.exists()
+    users, _ = user_admin.get_search_results(None, User.objects.all(), " ")
+    assert users.count() == 2